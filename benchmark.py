@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark suite for ga_solver
+
+Runs GASolver on generated TSP instances (seeded random coordinates, written in the cities.txt format)
+and on Mastermind matches of several secret sizes, and records for each case:
+    - generations per second and fitness evaluations per second
+    - peak memory (traced with tracemalloc on a separate short run, so that tracing does not slow the timed run)
+    - time to threshold (Mastermind: secret found, TSP: road within tsp_gap of a reference road of the instance,
+      a nearest-neighbour tour improved by 2-opt / Or-opt, the same for every version of the solver)
+    - TSP: gap between the best road of the run and the reference road
+Results are written as JSON, and can be compared with a previous results file to catch regressions.
+
+Usage:
+    python benchmark.py --output bench.json
+    python benchmark.py --tsp-sizes 12 1000 --mastermind-sizes 4 6 --compare bench.json
+    python benchmark.py --tsp-sizes 1000 --mastermind-sizes --crossover ox --local-search-rate 0.1
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+import cities
+import mastermind as mm
+from ga_solver import GASolver
+from mastermind_problem import MastermindProblem
+from tsp_problem import CROSSOVERS, TSProblem
+
+DEFAULT_TSP_SIZES = [12, 100, 1000, 10000]
+DEFAULT_MASTERMIND_SIZES = [4, 6, 8, 10]
+MEMORY_GENERATIONS = 3 #Generations of the traced run used to measure the peak memory
+
+
+def write_random_cities(filename, nb_cities, seed, size=1000):
+    """Write nb_cities cities with seeded random coordinates in the cities.txt format
+
+    Args:
+        filename (str): file to write
+        nb_cities (int): number of cities
+        seed (int): seed of the coordinates
+        size (int, optional): coordinates are drawn between 0 and size. Defaults to 1000.
+    """
+    coords = np.random.default_rng(seed).integers(0, size, (nb_cities, 2))
+    with open(filename, 'w') as file:
+        file.write(f"{nb_cities}\n")
+        for i, (x, y) in enumerate(coords):
+            file.write(f"City {i};{x};{y}\n")
+
+
+def reference_length(city_dict):
+    """Length of the reference road of a TSP instance: nearest-neighbour tour from the first city, improved by 2-opt and Or-opt.
+    It only depends on the instance, so that the time to threshold of different versions of the solver can be compared"""
+    problem = TSProblem(city_dict) #Separate problem: the caches of the benchmarked one are not built in advance
+    return problem.tour_length(problem.local_search.improve(problem.nearest_neighbour_tour(0)))
+
+
+def make_problem(kind, size, seed, workdir, tsp_options=None):
+    """Create the problem of a benchmark case
+
+    Args:
+        tsp_options (dict, optional): keyword arguments of TSProblem (crossover, local_search_rate). Defaults to None.
+
+    Returns:
+        tuple: (GAProblem, threshold_fitness or None for the TSP, TSP reference road length or None)
+    """
+    if kind == 'tsp':
+        filename = os.path.join(workdir, f"cities_{size}_{seed}.txt")
+        write_random_cities(filename, size, seed)
+        city_dict = cities.load_cities(filename)
+        return TSProblem(city_dict, **(tsp_options or {})), None, reference_length(city_dict)
+    match = mm.MastermindMatch(secret_size=size, seed=seed)
+    return MastermindProblem(match), match.max_score(), None
+
+
+def run_case(kind, size, pop_size, max_generations, max_seconds, seed, vectorized, tsp_gap, workdir, tsp_options=None):
+    """Run one benchmark case and return its measures as a dict"""
+    problem, threshold, reference = make_problem(kind, size, seed, workdir, tsp_options)
+    if reference is not None: #Threshold: within tsp_gap of the reference road
+        threshold = -reference * (1 + tsp_gap)
+    solver = GASolver(problem, vectorized=vectorized, seed=seed)
+
+    start = time.perf_counter()
+    solver.reset_population(pop_size)
+    times, bests = [], []
+    generations = 0
+    while generations < max_generations and time.perf_counter() - start < max_seconds:
+        solver.evolve_for_one_generation()
+        generations += 1
+        best = float(solver.get_fitnesses().max())
+        times.append(time.perf_counter() - start)
+        bests.append(best)
+        if threshold is not None and best >= threshold:
+            break
+    elapsed = time.perf_counter() - start
+
+    reached = [t for t, best in zip(times, bests) if best >= threshold]
+
+    tracemalloc.start()
+    memory_solver = GASolver(problem, vectorized=vectorized, seed=seed)
+    memory_solver.reset_population(pop_size)
+    for _ in range(MEMORY_GENERATIONS):
+        memory_solver.evolve_for_one_generation()
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'case': f"{kind}-{size}",
+        'problem': kind,
+        'size': size,
+        'pop_size': pop_size,
+        'vectorized': problem.has_batch_hooks() if vectorized is None else vectorized,
+        'generations': generations,
+        'evaluations': solver.get_nb_evaluations(),
+        'seconds': elapsed,
+        'generations_per_sec': generations / elapsed,
+        'evaluations_per_sec': solver.get_nb_evaluations() / elapsed,
+        'peak_memory_bytes': peak_memory,
+        'best_fitness': bests[-1] if bests else None,
+        'threshold_fitness': threshold,
+        'time_to_threshold': reached[0] if reached else None,
+        'reference_length': reference,
+        'reference_gap': -bests[-1] / reference - 1 if reference is not None and bests else None,
+    }
+
+
+def solver_version():
+    """Git commit of the solver, if the benchmark runs from a git checkout"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Print the throughput of each case against a previous results file, and its time to threshold
+    when both runs used the same threshold (same TSP reference road)
+
+    Returns:
+        list[str]: the cases slower than the baseline by more than tolerance
+    """
+    previous = {r['case']: r for r in baseline['results']}
+    regressions = []
+    for result in results:
+        old = previous.get(result['case'])
+        if old is None:
+            continue
+        ratio = result['generations_per_sec'] / old['generations_per_sec']
+        line = f"{result['case']:>16}: {ratio:6.2f}x generations/sec"
+        if old.get('threshold_fitness') != result['threshold_fitness']: #Different instance or --tsp-gap: times are not comparable
+            line += ", different threshold"
+        elif old.get('time_to_threshold') and result['time_to_threshold']:
+            line += f", {old['time_to_threshold'] / result['time_to_threshold']:6.2f}x faster to threshold"
+        print(f"{line} vs {baseline.get('solver_version')}")
+        if ratio < 1 - tolerance:
+            regressions.append(result['case'])
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark GASolver throughput and convergence")
+    parser.add_argument('--tsp-sizes', type=int, nargs='*', default=DEFAULT_TSP_SIZES, help="numbers of cities of the generated TSP instances")
+    parser.add_argument('--mastermind-sizes', type=int, nargs='*', default=DEFAULT_MASTERMIND_SIZES, help="secret sizes of the Mastermind matches")
+    parser.add_argument('--pop-size', type=int, default=50)
+    parser.add_argument('--generations', type=int, default=200, help="maximum number of generations of each case")
+    parser.add_argument('--max-seconds', type=float, default=30.0, help="time budget of each case")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', choices=['auto', 'vectorized', 'individual'], default='auto', help="population mode of GASolver")
+    parser.add_argument('--tsp-gap', type=float, default=0.05, help="TSP threshold: relative gap to the reference road of the instance")
+    parser.add_argument('--crossover', choices=CROSSOVERS, default='midpoint', help="crossover of the TSP cases")
+    parser.add_argument('--local-search-rate', type=float, default=0.0, help="part of the TSP children improved by 2-opt / Or-opt")
+    parser.add_argument('--output', default='benchmark_results.json')
+    parser.add_argument('--compare', help="previous results file to compare with")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="slowdown ratio reported as a regression")
+    args = parser.parse_args(argv)
+
+    vectorized = {'auto': None, 'vectorized': True, 'individual': False}[args.mode]
+    tsp_options = {'crossover': args.crossover, 'local_search_rate': args.local_search_rate}
+    cases = [('tsp', n) for n in args.tsp_sizes] + [('mastermind', n) for n in args.mastermind_sizes]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for kind, size in cases:
+            result = run_case(kind, size, args.pop_size, args.generations, args.max_seconds, args.seed, vectorized, args.tsp_gap, workdir, tsp_options)
+            results.append(result)
+            print(f"{result['case']:>16}: {result['generations_per_sec']:10.1f} gen/s {result['evaluations_per_sec']:12.1f} eval/s "
+                  f"{result['peak_memory_bytes']/2**20:8.1f} MiB  time to threshold {result['time_to_threshold']}"
+                  + (f"  gap to reference {result['reference_gap']:.1%}" if result['reference_gap'] is not None else ""))
+
+    report = {
+        'solver_version': solver_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'parameters': vars(args),
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -10,7 +10,8 @@ This module is accompanied of a cities.txt file, containing a list of
 2D coordinates representing different cities.
 """
 
-import matplotlib.pyplot as plt
+import os
+import numpy as np
 from random import shuffle
 from typing import List, Dict, Tuple, Optional
 from collections.abc import Iterable, Mapping
@@ -28,30 +29,244 @@ def load_cities(filename) -> Dict[str,Coordinates]:
         return cities
 
 
+def load_city_arrays(filename, use_cache=True) -> Tuple[np.ndarray, np.ndarray]:
+    """ Bulk load of a cities file into contiguous arrays: the names and the (n, 2) coordinates, 
+    in the order of the text file (same order as load_cities).
+    With use_cache, the arrays are saved as .npy files next to the text file and memory-mapped
+    on the next loads, as long as they are newer than the text file (several processes can load the same file at once) """
+    names_cache, coords_cache = f"{filename}.names.npy", f"{filename}.coords.npy"
+    if use_cache and all(os.path.exists(f) and os.path.getmtime(f) >= os.path.getmtime(filename) for f in (names_cache, coords_cache)):
+        return np.load(names_cache, mmap_mode='r'), np.load(coords_cache, mmap_mode='r')
+    with open(filename) as file:
+        nbCities = int(file.readline())
+        fields = file.read().replace("\n", ";").split(";") #name;x;y of every city in one flat list
+    names = np.array(fields[0:3*nbCities:3])
+    coords = np.empty((nbCities, 2), dtype=np.int64)
+    coords[:, 0] = np.array(fields[1:3*nbCities:3], dtype=np.int64)
+    coords[:, 1] = np.array(fields[2:3*nbCities:3], dtype=np.int64)
+    if use_cache:
+        for cache, array in ((names_cache, names), (coords_cache, coords)):
+            temporary = f"{cache}.{os.getpid()}.tmp" #Written then renamed: a concurrent load never maps a half-written file
+            try:
+                with open(temporary, 'wb') as file:
+                    np.save(file, array)
+                os.replace(temporary, cache)
+            except OSError: #Read-only directory: no cache
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+    return names, coords
+
+
+class CityGrid:
+    """ Spatial index of cities: a uniform grid of square cells, used to find the nearest neighbours of every city
+    without computing all the n² distances """
+
+    def __init__(self, coords, cities_per_cell=8):
+        """ Build the grid over the cities
+
+        Args:
+            coords (array): (n, 2) coordinates of the cities
+            cities_per_cell (int, optional): average number of cities per cell, about the number of neighbours searched is fastest. Defaults to 8.
+        """
+        self.coords = np.asarray(coords, dtype=float)
+        low, high = self.coords.min(axis=0), self.coords.max(axis=0)
+        extent = high - low
+        nb_cells = max(len(self.coords) / cities_per_cell, 1.0) #Number of cells aimed at
+        cell_size = (float(np.prod(extent)) / nb_cells)**0.5
+        if extent.min() <= cell_size: #Thin or collinear instance: a single row of cells along the long side
+            cell_size = float(extent.max()) / nb_cells
+        self.cell_size = max(cell_size, 1e-9)
+        self.origin = low
+        self.shape = ((high - low) // self.cell_size).astype(int) + 1 #Number of cells along x and y
+        self.cells = self._cells(self.coords) #Cell (column, row) of each city
+        cell_ids = self.cells[:, 0] * self.shape[1] + self.cells[:, 1]
+        self.order = np.argsort(cell_ids, kind='stable') #Cities sorted by cell
+        self.starts = np.searchsorted(cell_ids[self.order], np.arange(self.shape[0] * self.shape[1] + 1)) #Cities of cell c: order[starts[c]:starts[c+1]]
+
+    def _cells(self, points):
+        """ Cell (column, row) of each point """
+        return np.minimum(((points - self.origin) // self.cell_size).astype(int), self.shape - 1)
+
+    def cities_around(self, cell, ring):
+        """ Indices of the cities in the square of cells at most "ring" cells away from a cell """
+        x_low, y_low = np.maximum(np.asarray(cell) - ring, 0)
+        x_high, y_high = np.minimum(np.asarray(cell) + ring, self.shape - 1)
+        columns = [self.order[self.starts[x*self.shape[1] + y_low]:self.starts[x*self.shape[1] + y_high + 1]] for x in range(x_low, x_high + 1)]
+        return np.concatenate(columns)
+
+    def cities_in_cells(self, cells):
+        """ Indices of the cities in the given cells (flat cell numbers), without a Python loop over the cells """
+        firsts, lasts = self.starts[cells], self.starts[cells + 1]
+        sizes = lasts - firsts
+        offsets = np.repeat(firsts - np.cumsum(sizes) + sizes, sizes) #Start of each city's cell, minus the cities of the previous cells
+        return self.order[offsets + np.arange(sizes.sum())]
+
+    def remaining_counts(self):
+        """ Number of cities in each cell, as a 2-D array of the grid shape, to give to nearest_remaining """
+        return np.diff(self.starts).reshape(self.shape)
+
+    def nearest_remaining(self, city, remaining, counts):
+        """ Nearest city among the remaining ones, searching rings of cells further and further away that still hold remaining cities
+
+        Args:
+            city (int): index of the city to start from
+            remaining (ndarray): boolean array, True for the cities that can be chosen
+            counts (ndarray): number of remaining cities in each cell (see remaining_counts), kept up to date by the caller
+
+        Returns:
+            int: index of the nearest remaining city, None if there is none
+        """
+        cell = self._cells(self.coords[city][None, :])[0]
+        ring = 1
+        while True:
+            low, high = np.maximum(cell - ring, 0), np.minimum(cell + ring, self.shape - 1)
+            whole_grid = (low == 0).all() and (high == self.shape - 1).all()
+            xs, ys = np.nonzero(counts[low[0]:high[0]+1, low[1]:high[1]+1])
+            if len(xs) == 0:
+                if whole_grid:
+                    return None
+                ring *= 2 #Everything around is taken: grow quickly
+                continue
+            candidates = self.cities_in_cells((xs + low[0]) * self.shape[1] + ys + low[1])
+            candidates = candidates[remaining[candidates]]
+            distances = np.hypot(*(self.coords[candidates] - self.coords[city]).T)
+            nearest = int(np.argmin(distances))
+            if distances[nearest] <= ring * self.cell_size or whole_grid:
+                return int(candidates[nearest])
+            ring = max(ring + 1, int(np.ceil(distances[nearest] / self.cell_size))) #This ring holds all the cities closer than the one found
+
+    def nearest_neighbours(self, k, chunk_size=65536):
+        """ The k nearest other cities of every city, closest first
+
+        Args:
+            k (int): number of neighbours (at most n-1)
+            chunk_size (int, optional): number of cities processed at once (bounds the temporary memory). Defaults to 65536.
+
+        Returns:
+            ndarray: (n, k) array of city indices
+        """
+        nb_cities = len(self.coords)
+        k = min(k, nb_cities - 1)
+        neighbours = np.empty((nb_cities, k), dtype=np.int64)
+        nb_cells = self.shape[0] * self.shape[1]
+        counts = np.diff(self.starts)
+        width = int(min(counts.max(), 4 * counts.mean() + 16)) #Cities of a cell kept in the table (crowded cells are handled one city at a time)
+        table = np.full((nb_cells + 1, width), -1, dtype=np.int64) #Cities of each cell, padded with -1, the last row stands for cells outside the grid
+        sorted_cells = np.repeat(np.arange(nb_cells), counts)
+        rank = np.arange(nb_cities) - self.starts[sorted_cells] #Rank of each city in its cell
+        kept = rank < width
+        table[sorted_cells[kept], rank[kept]] = self.order[kept]
+        overflow = np.append(counts > width, False)
+
+        cells = self.cells
+        xs, ys = self.coords[:, 0].copy(), self.coords[:, 1].copy()
+        pending = [] #Cities whose neighbours may lie outside the 3x3 cells around them
+        for start in range(0, nb_cities, chunk_size):
+            cities = np.arange(start, min(start + chunk_size, nb_cities))
+            around = []
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    x, y = cells[cities, 0] + dx, cells[cities, 1] + dy
+                    inside = (x >= 0) & (x < self.shape[0]) & (y >= 0) & (y < self.shape[1])
+                    around.append(np.where(inside, x * self.shape[1] + y, nb_cells))
+            around = np.stack(around, axis=1)
+            candidates = table[around].reshape(len(cities), -1)
+            if candidates.shape[1] <= k:
+                pending.extend(cities)
+                continue
+            distances = np.square(xs[candidates] - xs[cities, None]) #Squared distances, enough to compare them
+            distances += np.square(ys[candidates] - ys[cities, None])
+            distances[(candidates < 0) | (candidates == cities[:, None])] = np.inf
+            nearest = np.argpartition(distances, k-1, axis=1)[:, :k]
+            nearest_distances = np.take_along_axis(distances, nearest, axis=1)
+            exact = (nearest_distances.max(axis=1) <= self.cell_size**2) & ~overflow[around].any(axis=1) #Any city outside the 3x3 cells is farther than cell_size
+            closest_first = np.argsort(nearest_distances, axis=1)
+            found = np.take_along_axis(candidates, np.take_along_axis(nearest, closest_first, axis=1), axis=1)
+            neighbours[cities[exact]] = found[exact]
+            pending.extend(cities[~exact])
+
+        for city in pending:
+            neighbours[city] = self._nearest_of(city, k)
+        return neighbours
+
+    def _nearest_of(self, city, k):
+        """ The k nearest other cities of one city, searching rings of cells further and further away """
+        cell = self._cells(self.coords[city][None, :])[0]
+        ring = 1
+        while True:
+            candidates = self.cities_around(cell, ring)
+            candidates = candidates[candidates != city]
+            distances = np.hypot(*(self.coords[candidates] - self.coords[city]).T)
+            if len(candidates) < k:
+                ring *= 2 #Empty area: grow quickly instead of one cell at a time
+                continue
+            nearest = np.argsort(distances, kind='stable')[:k]
+            kth_distance = distances[nearest[-1]]
+            if kth_distance <= ring * self.cell_size or len(candidates) == len(self.coords) - 1:
+                return candidates[nearest]
+            ring = max(ring + 1, int(np.ceil(kth_distance / self.cell_size))) #This ring holds all the cities closer than the k-th one found
+
+
 def default_road(cities:Dict) -> List:
     """ Default road: all the cities in the order of the text file """
     return list(cities.keys())
 
 
-def draw_cities(cities:Dict, road=Optional[Iterable[str]]):
-    """ Plot the cities and the trajectory """
+def _plot_road(axes, cities:Dict, road:Optional[Iterable[str]], labels=True):
+    """ Draw the cities and the trajectory on matplotlib axes """
     x_cords, y_coords = tuple(zip(*cities.values()))
-    plt.figure()
-    plt.scatter(x_cords, y_coords, color="red")
+    axes.scatter(x_cords, y_coords, color="red")
     if road is not None:
+        names = list(cities)
+        road = [names[c] if not isinstance(c, str) else c for c in road] #Decode a compact road of city indices
         road_coordinates = [cities[c] for c in road]
         x_cords, y_coords = list(zip(*road_coordinates))
-        plt.plot(x_cords, y_coords)
-        for city_name in road:
-            plt.annotate(
-                city_name, 
-                cities[city_name],
-                xytext=(4, -1), 
-                textcoords='offset points')
-    plt.gca().set_aspect('equal')
+        axes.plot(x_cords, y_coords)
+        if labels:
+            for city_name in road:
+                axes.annotate(
+                    str(city_name), 
+                    cities[city_name],
+                    xytext=(4, -1), 
+                    textcoords='offset points')
+    axes.set_aspect('equal')
+
+
+def draw_cities(cities:Dict, road:Optional[Iterable[str]]=None, filename=None):
+    """ Plot the cities and the trajectory (the road can also be given as indices of the cities in the dict order).
+    With a filename, the plot is saved to the file (PNG, SVG... from the extension) instead of being shown,
+    which does not need a display nor block the program """
+    if filename is not None:
+        save_road_image(cities, road, filename)
+        return
+    import matplotlib.pyplot as plt #Imported only when plotting: importing this module stays cheap for the solver processes
+    plt.figure()
+    _plot_road(plt.gca(), cities, road)
     plt.show()
 
 
+def save_road_image(cities:Dict, road:Optional[Iterable[str]], filename, title=None, labels=None):
+    """ Save the plot of the cities and the trajectory to an image file, without pyplot: no display is needed
+    and it can be called from a background thread
+
+    Args:
+        cities (dict): cities with their coordinates
+        road (iterable): road to draw, as city names or indices, or None for the cities only
+        filename (str): image file, its extension gives the format (png, svg, pdf...)
+        title (str, optional): title of the plot. Defaults to None.
+        labels (bool, optional): write the names of the cities. Defaults to None (only up to 50 cities).
+    """
+    from matplotlib.figure import Figure #Imported only when plotting, Figure does not use the GUI of pyplot
+    if labels is None:
+        labels = len(cities) <= 50
+    figure = Figure(figsize=(8, 8))
+    axes = figure.add_subplot()
+    _plot_road(axes, cities, road, labels)
+    if title is not None:
+        axes.set_title(title)
+    figure.savefig(filename)
+
+
 def distance(city1:Coordinates, city2:Coordinates) -> float:
     """ Euclidian distance between two cities """
     return ((city1[0] - city2[0])**2 + (city1[1] - city2[1])**2)**0.5
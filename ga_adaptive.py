@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive control of ga_solver
+
+Controllers registered on a GASolver (GASolver(problem, controllers=[...]) or solver.add_controller(...)) are called
+after each generation with the solver and the statistics of the generation (see ga_solver.GENERATION_STATISTICS),
+and change the parameters of the run for the next generations instead of keeping the values given at the start:
+    - OneFifthRule and DiversityMutationRate adapt the mutation rate
+    - OperatorBandit chooses among the operators registered by the problem (GAProblem.operator_variants)
+      the one that has recently produced the most successful children
+    - PopulationResizing grows the population when the run stagnates and shrinks it while it improves
+The success rate of a generation is the part of its children better than both their parents.
+The state of the controllers (get_state, set_state) is saved in the checkpoints of the solver, so that resumed runs
+continue with what they learnt.
+"""
+import math
+import numpy as np
+
+
+class AdaptiveController:
+    """Base class of the controllers: override on_generation"""
+
+    def on_generation(self, solver, statistics):
+        """Called after each generation, before the observers
+
+        Args:
+            solver (GASolver): the solver running, to adapt
+            statistics (dict): statistics of the generation, with the keys of GENERATION_STATISTICS
+        """
+        pass
+
+    def get_state(self):
+        """State of the controller saved in the checkpoints of the solver, as a dict that can be written as JSON"""
+        return {}
+
+    def set_state(self, state):
+        """Restore the state returned by get_state, when a run is resumed from a checkpoint"""
+        pass
+
+
+class OneFifthRule(AdaptiveController):
+    """Rechenberg's 1/5 success rule applied to the mutation rate: when the success rate is above target the search
+    is too cautious and the mutation rate is multiplied by factor, when it is below the rate is divided by it.
+    The 1/5 target of evolution strategies is too high for a GA, whose children rarely beat both their parents:
+    with it the mutation rate only decreases, so the default target is 0.02."""
+
+    def __init__(self, factor=1.2, min_rate=0.01, max_rate=1.0, target=0.02):
+        """
+        Args:
+            factor (float, optional): multiplier of the mutation rate at each generation. Defaults to 1.2.
+            min_rate (float, optional): lowest mutation rate. Defaults to 0.01.
+            max_rate (float, optional): highest mutation rate. Defaults to 1.0.
+            target (float, optional): success rate aimed at (0.2 for the original rule). Defaults to 0.02.
+        """
+        self.factor = factor
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target = target
+
+    def on_generation(self, solver, statistics):
+        rate = solver.get_mutation_rate()
+        if statistics['success_rate'] > self.target:
+            rate *= self.factor
+        elif statistics['success_rate'] < self.target:
+            rate /= self.factor
+        solver.set_mutation_rate(min(self.max_rate, max(self.min_rate, rate)))
+
+
+class DiversityMutationRate(AdaptiveController):
+    """Raise the mutation rate while the diversity of the population is below target_diversity (the population is collapsing),
+    lower it while the diversity is above"""
+
+    def __init__(self, target_diversity=0.2, factor=1.2, min_rate=0.01, max_rate=1.0):
+        """
+        Args:
+            target_diversity (float, optional): diversity aimed at (see GASolver.get_diversity). Defaults to 0.2.
+            factor (float, optional): multiplier of the mutation rate at each generation. Defaults to 1.2.
+            min_rate (float, optional): lowest mutation rate. Defaults to 0.01.
+            max_rate (float, optional): highest mutation rate. Defaults to 1.0.
+        """
+        self.target_diversity = target_diversity
+        self.factor = factor
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+
+    def on_generation(self, solver, statistics):
+        rate = solver.get_mutation_rate()
+        rate = rate*self.factor if statistics['diversity'] < self.target_diversity else rate/self.factor
+        solver.set_mutation_rate(min(self.max_rate, max(self.min_rate, rate)))
+
+
+class OperatorBandit(AdaptiveController):
+    """Adaptive operator selection: a multi-armed bandit choosing, before each generation, the value of an operator
+    attribute of the problem (e.g. the crossover of TSProblem), rewarded by the success rate of the generation.
+    Rewards are averaged with a constant step, so that recent generations count more (the best operator changes during a run),
+    compared relatively to the best average, and each value gets an exploration bonus (UCB1) that decreases as it is used."""
+
+    def __init__(self, attribute, values=None, exploration=0.1, step=0.2):
+        """
+        Args:
+            attribute (str): attribute of the problem to choose, registered in GAProblem.operator_variants
+            values (list, optional): values to choose from. Defaults to None (all the registered values).
+            exploration (float, optional): weight of the exploration bonus. Defaults to 0.1.
+            step (float, optional): weight of the last reward in the average reward of a value. Defaults to 0.2.
+        """
+        self.attribute = attribute
+        self.values = None if values is None else list(values)
+        self.exploration = exploration
+        self.step = step
+        self.rewards = None #Average reward of each value
+        self.counts = None #Number of generations run with each value
+
+    def on_generation(self, solver, statistics):
+        problem = solver.get_problem()
+        if self.values is None:
+            variants = problem.operator_variants()
+            if self.attribute not in variants:
+                raise ValueError(f"{type(problem).__name__} has no operator variants for {self.attribute!r}")
+            self.values = list(variants[self.attribute])
+        if self.rewards is None:
+            self.rewards = np.zeros(len(self.values))
+            self.counts = np.zeros(len(self.values), dtype=int)
+        current = getattr(problem, self.attribute)
+        if current in self.values: #Reward the value used by the generation that just ended
+            arm = self.values.index(current)
+            self.counts[arm] += 1
+            self.rewards[arm] += max(self.step, 1 / self.counts[arm]) * (statistics['success_rate'] - self.rewards[arm])
+        untried = np.flatnonzero(self.counts == 0)
+        if len(untried):
+            arm = untried[0]
+        else:
+            best_reward = self.rewards.max()
+            scaled = self.rewards / best_reward if best_reward > 0 else self.rewards #Success rates are often tiny: compare values to the best one
+            bonus = self.exploration * np.sqrt(2 * math.log(self.counts.sum()) / self.counts)
+            arm = int(np.argmax(scaled + bonus))
+        setattr(problem, self.attribute, self.values[arm])
+
+    def get_state(self):
+        return {'values': self.values,
+                'rewards': None if self.rewards is None else self.rewards.tolist(),
+                'counts': None if self.counts is None else self.counts.tolist()}
+
+    def set_state(self, state):
+        self.values = state['values']
+        self.rewards = None if state['rewards'] is None else np.array(state['rewards'])
+        self.counts = None if state['counts'] is None else np.array(state['counts'], dtype=int)
+
+    def get_preferences(self):
+        """Return the average reward and the number of generations of each value, as a dict"""
+        if self.rewards is None:
+            return {}
+        return {value: (float(reward), int(count)) for value, reward, count in zip(self.values, self.rewards, self.counts)}
+
+
+class PopulationResizing(AdaptiveController):
+    """Grow the population by grow_factor (new random Individuals) when the best fitness has not improved for patience generations,
+    and shrink it by shrink_factor (the worst Individuals are removed) after each generation improving the best fitness,
+    so that fitness evaluations are spent on exploration only when the run is stuck"""
+
+    def __init__(self, min_size=20, max_size=1000, grow_factor=1.5, shrink_factor=0.95, patience=20):
+        """
+        Args:
+            min_size (int, optional): smallest population. Defaults to 20.
+            max_size (int, optional): largest population. Defaults to 1000.
+            grow_factor (float, optional): multiplier of the population size when the run stagnates. Defaults to 1.5.
+            shrink_factor (float, optional): multiplier of the population size when the run improves. Defaults to 0.95.
+            patience (int, optional): generations without improvement before growing. Defaults to 20.
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.grow_factor = grow_factor
+        self.shrink_factor = shrink_factor
+        self.patience = patience
+        self._best = None #Best fitness at the last improvement
+        self._since = 0 #Generations since the last improvement
+
+    def get_state(self):
+        return {'best': self._best, 'since': self._since}
+
+    def set_state(self, state):
+        self._best, self._since = state['best'], state['since']
+
+    def on_generation(self, solver, statistics):
+        pop_size = statistics['pop_size']
+        if self._best is None or statistics['best_fitness'] > self._best:
+            improved = self._best is not None
+            self._best = statistics['best_fitness']
+            self._since = 0
+            if improved:
+                solver.resize_population(max(self.min_size, int(pop_size * self.shrink_factor)))
+            return
+        self._since += 1
+        if self._since >= self.patience:
+            self._since = 0
+            solver.resize_population(min(self.max_size, math.ceil(pop_size * self.grow_factor)))
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Island model on top of ga_solver
+
+Several GASolver populations ("islands") evolve in separate processes, each with its own selection and mutation rates.
+Every migration_interval generations, each island sends copies of its best Individuals to another island
+(ring or random topology), where they replace the worst ones.
+"""
+import multiprocessing
+import numpy as np
+from ga_solver import GASolver
+
+TOPOLOGIES = ('ring', 'random')
+
+
+def _island_worker(conn, problem, solver_kwargs, pop_size, seed_seq):
+    """Process running one island: keeps its GASolver and answers the commands of the IslandSolver
+
+    Commands received on conn:
+        ('evolve', nb_of_generations, threshold_fitness) -> (emigrants, statistics) after evolving
+        ('migrate', immigrants) -> receives a list of (chromosomes, fitnesses) from other islands
+        ('best',) -> the best Individual of the island
+        ('stop',) -> end of the process
+    """
+    solver = GASolver(problem, seed=seed_seq, **solver_kwargs) #Independent streams of the island, spawned from the seed of the IslandSolver
+    solver.reset_population(pop_size)
+    generations = 0
+    while True:
+        command, *args = conn.recv()
+        if command == 'evolve':
+            nb_of_generations, threshold_fitness, migration_size = args
+            for _ in range(nb_of_generations):
+                solver.evolve_for_one_generation()
+                generations += 1
+                if threshold_fitness is not None and solver.get_best_fitness() >= threshold_fitness:
+                    break
+            fitnesses = solver.get_fitnesses()
+            statistics = {'generations': generations, 'best_fitness': float(fitnesses.max()), 'mean_fitness': float(fitnesses.mean())}
+            conn.send((solver.select_emigrants(migration_size), statistics))
+        elif command == 'migrate':
+            for chromosomes, fitnesses in args[0]:
+                solver.receive_immigrants(chromosomes, fitnesses)
+        elif command == 'best':
+            conn.send(solver.get_best_individual())
+        elif command == 'stop':
+            conn.close()
+            return
+
+
+class IslandSolver:
+    """Island-model genetic algorithm: runs several GASolver populations in parallel processes with migrations between them"""
+
+    def __init__(self, problem, nb_islands=4, pop_size=50, selection_rates=0.5, mutation_rates=0.1,
+                 migration_interval=10, migration_size=2, topology='ring', vectorized=None, seed=None):
+        """Initialize the islands for a given GAProblem (the problem must be picklable)
+
+        Args:
+            problem (GAProblem): GAProblem to be solved by every island
+            nb_islands (int, optional): number of islands, each one in its own process. Defaults to 4.
+            pop_size (int, optional): number of Individuals of each island. Defaults to 50.
+            selection_rates (float or list[float], optional): selection rate of all islands, or one per island. Defaults to 0.5.
+            mutation_rates (float or list[float], optional): mutation rate of all islands, or one per island. Defaults to 0.1.
+            migration_interval (int, optional): number of generations between two migrations. Defaults to 10.
+            migration_size (int, optional): number of best Individuals sent by each island at each migration. Defaults to 2.
+            topology (str, optional): 'ring' (island i sends to island i+1) or 'random' (each island sends to a random other one). Defaults to 'ring'.
+            vectorized (bool, optional): see GASolver. Defaults to None.
+            seed (int, optional): seed of the whole run, each island gets its own independent stream. Defaults to None.
+        """
+        if topology not in TOPOLOGIES:
+            raise ValueError(f"topology must be one of {TOPOLOGIES}, not {topology!r}")
+        self._problem = problem
+        self._nb_islands = nb_islands
+        self._pop_size = pop_size
+        self._selection_rates = self._per_island(selection_rates)
+        self._mutation_rates = self._per_island(mutation_rates)
+        self._migration_interval = migration_interval
+        self._migration_size = migration_size
+        self._topology = topology
+        self._vectorized = vectorized
+        self._seed_seq = np.random.SeedSequence(seed)
+        self._rng = np.random.default_rng(self._seed_seq.spawn(1)[0]) #Used to draw the random topology
+        self._processes = []
+        self._connections = []
+        self._statistics = []
+
+    def _per_island(self, value):
+        """Turn a parameter given for all islands into one value per island"""
+        values = list(value) if isinstance(value, (list, tuple)) else [value]*self._nb_islands
+        if len(values) != self._nb_islands:
+            raise ValueError(f"expected {self._nb_islands} values, got {len(values)}")
+        return values
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def reset_population(self):
+        """Start one process per island, each one with a new random population"""
+        self.close()
+        island_seeds = self._seed_seq.spawn(self._nb_islands)
+        for i in range(self._nb_islands):
+            solver_kwargs = {'selection_rate': self._selection_rates[i], 'mutation_rate': self._mutation_rates[i], 'vectorized': self._vectorized}
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(target=_island_worker, args=(child_conn, self._problem, solver_kwargs, self._pop_size, island_seeds[i]), daemon=True)
+            process.start()
+            child_conn.close()
+            self._processes.append(process)
+            self._connections.append(parent_conn)
+        self._statistics = [{'island': i, 'selection_rate': self._selection_rates[i], 'mutation_rate': self._mutation_rates[i],
+                             'generations': 0, 'best_fitness': None, 'mean_fitness': None, 'best_history': [], 'immigrants_received': 0}
+                            for i in range(self._nb_islands)]
+
+    def close(self):
+        """Stop the island processes"""
+        for conn in self._connections:
+            try:
+                conn.send(('stop',))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join()
+        self._processes = []
+        self._connections = []
+
+    def _destinations(self):
+        """Island receiving the emigrants of each island, according to the topology"""
+        islands = np.arange(self._nb_islands)
+        if self._topology == 'ring':
+            return (islands + 1) % self._nb_islands
+        return (islands + self._rng.integers(1, self._nb_islands, self._nb_islands)) % self._nb_islands #Never the island itself
+
+    def evolve_until(self, max_nb_of_generations=500, threshold_fitness=None):
+        """Evolve all islands in parallel, with a migration every migration_interval generations, until:
+            - Max nb of generation is achieved by the islands
+            - The fitness of the best Individual of one island is greater than or equal to threshold_fitness
+
+        Returns:
+            tuple: (best Individual of all islands, list of statistics of each island)
+        """
+        if not self._processes:
+            self.reset_population()
+        done = 0
+        while done < max_nb_of_generations:
+            nb_of_generations = min(self._migration_interval, max_nb_of_generations - done)
+            for conn in self._connections: #Every island evolves at the same time
+                conn.send(('evolve', nb_of_generations, threshold_fitness, self._migration_size))
+            results = [conn.recv() for conn in self._connections]
+            done += nb_of_generations
+
+            for island, (_, statistics) in zip(self._statistics, results):
+                island.update(statistics)
+                island['best_history'].append(statistics['best_fitness'])
+            if threshold_fitness is not None and any(island['best_fitness'] >= threshold_fitness for island in self._statistics):
+                break
+            if done >= max_nb_of_generations:
+                break
+            if self._nb_islands < 2: #No other island to migrate to
+                continue
+
+            immigrants = [[] for _ in range(self._nb_islands)]
+            for source, destination in enumerate(self._destinations()):
+                immigrants[destination].append(results[source][0])
+            for i, conn in enumerate(self._connections):
+                conn.send(('migrate', immigrants[i]))
+                self._statistics[i]['immigrants_received'] += sum(len(fitnesses) for _, fitnesses in immigrants[i])
+        return self.get_best_individual(), self.get_island_statistics()
+
+    def get_best_individual(self):
+        """Return the best Individual of all the islands"""
+        for conn in self._connections:
+            conn.send(('best',))
+        return max(conn.recv() for conn in self._connections)
+
+    def get_island_statistics(self):
+        """Return a list of statistics (dict) of each island: rates, generations, best and mean fitness, history of the best fitness at each migration, immigrants received"""
+        return [dict(island, best_history=list(island['best_history'])) for island in self._statistics]
+
+
+if __name__ == '__main__':
+
+    import cities
+    from tsp_problem import TSProblem
+
+    city_dict = cities.load_cities("cities.txt")
+    problem = TSProblem(city_dict)
+    with IslandSolver(problem, nb_islands=4, mutation_rates=[0.05, 0.1, 0.2, 0.4], seed=0) as solver:
+        best, statistics = solver.evolve_until(max_nb_of_generations=500)
+    for island in statistics:
+        print(island['island'], island['mutation_rate'], island['best_fitness'])
+    print(best)
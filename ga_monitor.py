@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Instrumentation of ga_solver
+
+Observers registered on a GASolver (GASolver(problem, observers=[...]) or solver.add_observer(...)) are notified
+after each generation with a dict of statistics: generation number, time spent in total and in each phase
+(selection, reproduction, mutation, improvement, fitness), best/mean/worst fitness, diversity estimate, success rate, mutation rate, population size,
+fitness evaluations and cache hits of the generation (see ga_solver.GENERATION_STATISTICS).
+"""
+import csv
+import numpy as np
+from ga_solver import GENERATION_STATISTICS
+
+
+class GenerationObserver:
+    """Base class for the observers of GASolver: override on_generation"""
+
+    def on_generation(self, statistics):
+        """Called after each generation
+
+        Args:
+            statistics (dict): statistics of the generation, with the keys of GENERATION_STATISTICS
+
+        Returns:
+            bool: True to ask evolve_until to stop after this generation
+        """
+        return False
+
+
+class GenerationRecorder(GenerationObserver):
+    """Low-overhead sink keeping the statistics of every generation in lists, readable as numpy arrays,
+    and optionally streaming them to a CSV file"""
+
+    def __init__(self, csv_filename=None, every=1):
+        """Initializes an empty recorder
+
+        Args:
+            csv_filename (str, optional): CSV file where each recorded generation is written as a row. Defaults to None.
+            every (int, optional): record one generation out of "every". Defaults to 1.
+        """
+        self.every = every
+        self._columns = {key: [] for key in GENERATION_STATISTICS}
+        self._file = None
+        self._writer = None
+        if csv_filename is not None:
+            self._file = open(csv_filename, 'w', newline='')
+            self._writer = csv.writer(self._file)
+            self._writer.writerow(GENERATION_STATISTICS)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self._columns['generation'])
+
+    def on_generation(self, statistics):
+        """Record the statistics of a generation (see GenerationObserver.on_generation)"""
+        if statistics['generation'] % self.every:
+            return False
+        row = [statistics[key] for key in GENERATION_STATISTICS]
+        for key, value in zip(GENERATION_STATISTICS, row):
+            self._columns[key].append(value)
+        if self._writer is not None:
+            self._writer.writerow(row)
+        return False
+
+    def as_arrays(self):
+        """Return the recorded statistics as a dict of 1-D numpy arrays, one per key of GENERATION_STATISTICS"""
+        return {key: np.array(values) for key, values in self._columns.items()}
+
+    def phase_totals(self):
+        """Return the total time spent in each phase over the recorded generations, to see where the time goes"""
+        return {key[len('time_'):]: float(np.sum(values)) for key, values in self._columns.items() if key.startswith('time_')}
+
+    def to_csv(self, filename):
+        """Write all the recorded statistics to a CSV file"""
+        with open(filename, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(GENERATION_STATISTICS)
+            writer.writerows(zip(*self._columns.values()))
+
+    def close(self):
+        """Close the CSV file, if any"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Selection strategies for ga_solver
+
+A selection strategy chooses, from the fitnesses of the population, which Individuals survive to the next generation
+and the pairs of parents of the children that fill the rest of the population.
+All strategies work on a 1-D array of fitnesses and return indices, so they serve both population modes of GASolver,
+and use argpartition (O(n)) instead of sorting the whole population.
+"""
+import numpy as np
+
+
+def top_indices(fitnesses, k):
+    """Indices of the k best fitnesses, in no particular order, in O(n)"""
+    if k <= 0:
+        return np.empty(0, dtype=int)
+    if k >= len(fitnesses):
+        return np.arange(len(fitnesses))
+    return np.argpartition(-fitnesses, k-1)[:k]
+
+
+class SelectionStrategy:
+    """Base class of the selection strategies: child classes implement select"""
+
+    def select(self, fitnesses, selection_rate, rng):
+        """Choose the survivors and the parents of the next generation
+
+        Args:
+            fitnesses (ndarray): 1-D float array, fitness of each Individual of the population
+            selection_rate (float): selection rate of the solver (see each strategy for its meaning)
+            rng (numpy.random.Generator): random generator to draw from
+
+        Returns:
+            tuple: (survivors, parents_a, parents_b) - indices of the Individuals kept as they are, then for each
+            child to create (population size - number of survivors) the indices of its two parents, always different
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def _distinct(parents_a, parents_b, nb_candidates, rng):
+        """Make sure the two parents of each child are different Individuals (indices in range(nb_candidates))"""
+        same = parents_a == parents_b
+        if same.any():
+            parents_b = parents_b.copy()
+            parents_b[same] = (parents_a[same] + rng.integers(1, nb_candidates, same.sum())) % nb_candidates
+        return parents_b
+
+
+class TruncationSelection(SelectionStrategy):
+    """The best selection_rate part of the population survives, and the parents are drawn uniformly among the survivors
+    (the original process of GASolver)"""
+
+    def select(self, fitnesses, selection_rate, rng):
+        nb_selected = round(len(fitnesses)*selection_rate)
+        survivors = top_indices(fitnesses, nb_selected)
+        nb_children = len(fitnesses) - nb_selected
+        parents_a = rng.integers(0, nb_selected, nb_children)
+        parents_b = (parents_a + rng.integers(1, nb_selected, nb_children)) % nb_selected #Always different from "a"
+        return survivors, survivors[parents_a], survivors[parents_b]
+
+
+class TournamentSelection(SelectionStrategy):
+    """The elite_count best Individuals survive, every other place goes to a child whose parents each won
+    a tournament between tournament_size Individuals drawn at random (selection_rate is not used)"""
+
+    def __init__(self, tournament_size=3, elite_count=1):
+        """
+        Args:
+            tournament_size (int, optional): number of Individuals competing in each tournament. Defaults to 3.
+            elite_count (int, optional): number of best Individuals kept as they are. Defaults to 1.
+        """
+        self.tournament_size = tournament_size
+        self.elite_count = elite_count
+
+    def select(self, fitnesses, selection_rate, rng):
+        pop_size = len(fitnesses)
+        nb_children = pop_size - min(self.elite_count, pop_size)
+        contestants = rng.integers(0, pop_size, (2*nb_children, self.tournament_size))
+        winners = contestants[np.arange(2*nb_children), np.argmax(fitnesses[contestants], axis=1)]
+        parents_a, parents_b = winners[:nb_children], winners[nb_children:]
+        return top_indices(fitnesses, self.elite_count), parents_a, self._distinct(parents_a, parents_b, pop_size, rng)
+
+
+class RouletteSelection(SelectionStrategy):
+    """The elite_count best Individuals survive, every other place goes to a child whose parents are drawn with
+    a probability proportional to their fitness, shifted so that the worst one has weight 0 (selection_rate is not used)"""
+
+    def __init__(self, elite_count=1):
+        """
+        Args:
+            elite_count (int, optional): number of best Individuals kept as they are. Defaults to 1.
+        """
+        self.elite_count = elite_count
+
+    def select(self, fitnesses, selection_rate, rng):
+        pop_size = len(fitnesses)
+        nb_children = pop_size - min(self.elite_count, pop_size)
+        weights = fitnesses - fitnesses.min() #Works with negative fitnesses (TSP)
+        probabilities = weights / weights.sum() if weights.sum() > 0 else None #Uniform when all fitnesses are equal
+        parents_a = rng.choice(pop_size, nb_children, p=probabilities)
+        parents_b = rng.choice(pop_size, nb_children, p=probabilities)
+        return top_indices(fitnesses, self.elite_count), parents_a, self._distinct(parents_a, parents_b, pop_size, rng)
@@ -8,10 +8,53 @@ From a template made by tdrumond & agademer
 EPF MDE P2025 DEA2
 Generic genetic algorithm module - applicable to any problem solvable with a genetic algorithm
 """
-import random
+import copy
+import heapq
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from functools import partial
+import numpy as np
+from ga_selection import TruncationSelection, top_indices
+from ga_termination import AnyOf, TerminationCriterion
+
+EXECUTORS = ('serial', 'thread', 'process') #Ways to run the fitness evaluations of a generation
+PHASES = ('selection', 'reproduction', 'mutation', 'improvement', 'fitness') #Phases of a generation timed for the observers
+GENERATION_STATISTICS = ('generation', 'time_total') + tuple(f'time_{phase}' for phase in PHASES) + \
+    ('best_fitness', 'mean_fitness', 'worst_fitness', 'diversity', 'success_rate', 'mutation_rate', 'pop_size',
+     'evaluations', 'cache_hits') #Keys of the statistics sent to the observers
+DIVERSITY_SAMPLE = 64 #Number of chromosomes compared to the best one to estimate the diversity
+CHECKPOINT_FORMAT = 3 #Version of the checkpoint files written by GASolver.save_checkpoint
+
+_worker_problem = None #Copy of the GAProblem installed once in each worker process of a process pool
+
+
+def _init_worker(problem):
+    """Initializer of the process pool workers: keep the problem so it is pickled once per worker, not once per task"""
+    global _worker_problem
+    _worker_problem = problem
+
+
+def _fitness_chunk(problem, batch, chunk):
+    """Calculate the fitness of a chunk of chromosomes in a worker (problem is None in a process pool worker)
+
+    Args:
+        problem (GAProblem): the problem, or None to use the one installed by _init_worker
+        batch (bool): True if chunk is a 2-D array for batch_fitness, False if it is a list of chromosomes
+        chunk (list or ndarray): chromosomes to evaluate
+    """
+    problem = problem if problem is not None else _worker_problem
+    if batch:
+        return np.asarray(problem.batch_fitness(chunk), dtype=float)
+    return [problem.problem_fitness(chromosome) for chromosome in chunk]
+
 
 class Individual:
     """Represents an Individual for a genetic algorithm (chromosome & fitness)"""
+    __slots__ = ('chromosome', 'fitness') #No __dict__: much less memory per Individual in big populations
 
     def __init__(self, chromosome: list, fitness: float):
         """Initializes an Individual for a genetic algorithm
@@ -34,12 +77,80 @@ class Individual:
         return f'Indiv({self.fitness:.1f},{self.chromosome})' #fitness is rounded for ease of reading
 
 
+class FitnessCache:
+    """Bounded memo of fitnesses keyed by canonical chromosomes (see GAProblem.canonical_chromosome),
+    evicting the least recently used entry when it is full"""
+
+    def __init__(self, max_size=10000):
+        """Initializes an empty cache
+
+        Args:
+            max_size (int, optional): maximum number of fitnesses kept. Defaults to 10000.
+        """
+        self.max_size = max_size
+        self.hits = 0 #Number of fitnesses found in the cache (or already being evaluated in the same batch)
+        self.misses = 0 #Number of fitnesses that had to be evaluated
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, keys):
+        """Look for a batch of keys, updating the hit/miss counters
+
+        Args:
+            keys (list): canonical chromosomes
+
+        Returns:
+            tuple: (found, missing) - found maps the position of each key in the cache to its fitness,
+            missing maps each distinct key not in the cache to the list of its positions
+        """
+        found, missing = {}, {}
+        for i, key in enumerate(keys):
+            if key in self._entries:
+                self._entries.move_to_end(key) #Most recently used
+                found[i] = self._entries[key]
+            else:
+                missing.setdefault(key, []).append(i)
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+        return found, missing
+
+    def store(self, key, fitness):
+        """Add a fitness to the cache, evicting the least recently used ones if it is full"""
+        self._entries[key] = fitness
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Empty the cache and reset the counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
 class GAProblem:
     """
     Defines a Genetic algorithm problem to be solved by ga_solver.
     It's an abstract class, we have to create a child class that inherits from this class for each problem we want to solve.
     All methods here have to be implemented in the child class, they are problem-specific.
+    Their random draws come from self.rng, the numpy random generator given by the solver (see GASolver seed),
+    so that a run can be reproduced.
     """
+    _rng = None
+
+    @property
+    def rng(self):
+        """numpy random generator of the operators, given by GASolver (a new unseeded one if the problem is used without solver)"""
+        if self._rng is None:
+            self._rng = np.random.default_rng()
+        return self._rng
+
+    @rng.setter
+    def rng(self, rng):
+        self._rng = rng
+
     def problem_chromosome(self):
         """Definition of the "chromosome" for the genetic algorithm"""
         pass
@@ -70,21 +181,313 @@ class GAProblem:
         """
         pass
 
+    def improvement(self, new_chrom):
+        """Optional hook - Improve a newborn chromosome after the mutation, e.g. with a local search (memetic algorithm)
+        By default the chromosome is kept as it is.
+
+        Args:
+            new_chrom (array): the newborn chromosome
+        """
+        return new_chrom
+
+    # Optional batch hooks: a problem implementing all of them can be solved in vectorized mode,
+    # where the whole population lives in a 2-D integer ndarray (one chromosome per row)
+
+    def batch_chromosomes(self, pop_size, rng):
+        """Optional hook - Create pop_size random chromosomes at once
+
+        Args:
+            pop_size (int): number of chromosomes to create
+            rng (numpy.random.Generator): random generator to draw from
+
+        Returns:
+            ndarray: 2-D integer array of shape (pop_size, len_chromosome)
+        """
+        raise NotImplementedError
+
+    def batch_fitness(self, chromosomes):
+        """Optional hook - Calculate the fitness of many chromosomes at once
+
+        Args:
+            chromosomes (ndarray): 2-D integer array, one chromosome per row
+
+        Returns:
+            ndarray: 1-D float array of fitnesses
+        """
+        raise NotImplementedError
+
+    def batch_reproduction(self, a, b, rng):
+        """Optional hook - Create one child per pair of parents at once
+
+        Args:
+            a (ndarray): 2-D integer array, the first parent of each child
+            b (ndarray): 2-D integer array, the second parent of each child
+            rng (numpy.random.Generator): random generator to draw from
+
+        Returns:
+            ndarray: 2-D integer array of children, same shape as a
+        """
+        raise NotImplementedError
+
+    def batch_mutation(self, chromosomes, rng):
+        """Optional hook - Mutate every given chromosome at once
+
+        Args:
+            chromosomes (ndarray): 2-D integer array of chromosomes to mutate
+            rng (numpy.random.Generator): random generator to draw from
+
+        Returns:
+            ndarray: 2-D integer array of mutated chromosomes
+        """
+        raise NotImplementedError
+
+    def batch_improvement(self, chromosomes, rng):
+        """Optional hook - Same as improvement for every child of the vectorized mode at once
+        By default the chromosomes are kept as they are.
+
+        Args:
+            chromosomes (ndarray): 2-D integer array of children
+            rng (numpy.random.Generator): random generator to draw from
+
+        Returns:
+            ndarray: 2-D integer array of improved chromosomes
+        """
+        return chromosomes
+
+    def decode_chromosome(self, chromosome):
+        """Translate a chromosome from its compact form (a row of the vectorized population, or a compact chromosome
+        of the per-Individual path) back to the problem's own representation, only called by get_best_individual
+
+        Args:
+            chromosome (ndarray or list): the compact chromosome
+        """
+        if isinstance(chromosome, np.ndarray):
+            return chromosome.tolist()
+        return chromosome
+
+    def chromosome_from_row(self, row):
+        """Translate a row of a 2-D array (see GASolver.load_checkpoint) back to a chromosome of the per-Individual path
+
+        Args:
+            row (ndarray): 1-D array
+        """
+        return row.tolist()
+
+    def canonical_chromosome(self, chromosome):
+        """Hashable key of a chromosome for the fitness cache: chromosomes with the same key must have the same fitness
+        Override it to map equivalent chromosomes to the same key.
+
+        Args:
+            chromosome (list or ndarray): a chromosome, or a row of the vectorized population
+        """
+        if isinstance(chromosome, np.ndarray):
+            return chromosome.tobytes()
+        return tuple(chromosome)
+
+    def operator_variants(self):
+        """Operators the problem can switch between during a run (see ga_adaptive.OperatorBandit)
+        Override it to register them.
+
+        Returns:
+            dict: name of the attribute choosing an operator -> tuple of its possible values
+        """
+        return {}
+
+    def has_batch_hooks(self):
+        """Check if the child class implements all the batch hooks needed by the vectorized mode"""
+        hooks = ('batch_chromosomes', 'batch_fitness', 'batch_reproduction', 'batch_mutation')
+        return all(getattr(type(self), hook) is not getattr(GAProblem, hook) for hook in hooks)
+
 
 
 class GASolver:
-    def __init__(self, problem: GAProblem, selection_rate=0.5, mutation_rate=0.1):
+    def __init__(self, problem: GAProblem, selection_rate=0.5, mutation_rate=0.1, vectorized=None,
+                 executor='serial', workers=None, chunk_size=None, seed=None, cache_size=None, observers=None, selection=None,
+                 steady_state=False, controllers=None):
         """Initialize an instance of a ga_solver for a given GAProblem
 
         Args:
             problem (GAProblem): GAProblem to be solved by this ga_solver
             selection_rate (float, optional): Selection rate between 0 and 1.0. Defaults to 0.5.
             mutation_rate (float, optional): mutation_rate between 0 and 1.0. Defaults to 0.1.
+            vectorized (bool, optional): Use the array-backed population (needs the batch hooks of GAProblem).
+                Defaults to None: vectorized if the problem implements the batch hooks, one Individual at a time otherwise.
+            executor (str, optional): How the fitness of each generation is evaluated: 'serial', 'thread' (thread pool)
+                or 'process' (process pool, the problem must be picklable). Defaults to 'serial'.
+            workers (int, optional): Number of workers of the pool. Defaults to None (number of CPUs).
+            chunk_size (int, optional): Number of chromosomes sent to a worker at once.
+                Defaults to None (the offspring is split in 4 chunks per worker).
+            seed (int or numpy.random.SeedSequence, optional): Seed of the run. Two independent random streams are spawned from it,
+                one for the solver (selection, choice of the children to mutate) and one given to the problem for its operators (problem.rng).
+                Defaults to None (not reproducible).
+            cache_size (int, optional): Keep the fitness of up to cache_size distinct chromosomes (keyed by
+                GAProblem.canonical_chromosome) to avoid evaluating them again. Defaults to None (no cache).
+            observers (list, optional): Objects notified after each generation, see add_observer. Defaults to None.
+            selection (SelectionStrategy, optional): How survivors and parents are chosen (see ga_selection).
+                Defaults to None (TruncationSelection: the best selection_rate part survives and breeds).
+            steady_state (bool, optional): evolve_until runs evolve_steady_state instead of whole generations,
+                each generation counting for one child per Individual of the population. Defaults to False.
+            controllers (list, optional): Objects adapting the solver after each generation, see add_controller. Defaults to None.
         """
+        if executor not in EXECUTORS:
+            raise ValueError(f"executor must be one of {EXECUTORS}, not {executor!r}")
+        if vectorized is None:
+            vectorized = problem.has_batch_hooks()
+        elif vectorized and not problem.has_batch_hooks():
+            raise ValueError(f"{type(problem).__name__} does not implement the batch hooks needed by the vectorized mode")
         self._problem = problem
         self._selection_rate = selection_rate
         self._mutation_rate = mutation_rate
+        self._vectorized = vectorized
+        self._selection = selection or TruncationSelection()
         self._population = []
+        self._best_index = None #Position of the best Individual in the population, kept up to date at each change
+        self._chromosomes = None #Vectorized mode: 2-D integer array, one chromosome per row
+        self._fitnesses = None #Vectorized mode: 1-D float array, fitness of each row of _chromosomes
+        seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        solver_sequence, problem_sequence = seed_sequence.spawn(2)
+        self._rng = np.random.default_rng(solver_sequence) #Selection and choice of the children to mutate
+        problem.rng = np.random.default_rng(problem_sequence) #Random draws of the operators of the problem
+        self._executor = executor
+        self._workers = workers or os.cpu_count() or 1
+        self._chunk_size = chunk_size
+        self._pool = None #Created on the first evaluation, see _get_pool
+        self._cache = FitnessCache(cache_size) if cache_size else None
+        self._nb_evaluations = 0 #Number of fitness evaluations actually computed (cache hits excluded)
+        self._observers = list(observers or [])
+        self._controllers = list(controllers or [])
+        self._generation = 0 #Number of generations evolved since the solver was created
+        self._phase_times = dict.fromkeys(PHASES, 0.0) #Time spent in each phase of the current generation
+        self._nb_children = 0 #Children created in the current generation
+        self._nb_successes = 0 #Children of the current generation better than both their parents
+        self._stop_requested = False #Set when an observer asks evolve_until to stop
+        self._run = None #Progress of the current evolve_until run, saved in checkpoints
+        self._checkpoint_thread = None #Background thread writing the last checkpoint
+        self._steady_state = steady_state
+        self._worst_heap = [] #(fitness, index) of the population in steady-state mode, the worst first
+        self._steady_parents = None #Pairs of parents drawn for the current generation in steady-state mode
+        self._next_parents = 0 #Next pair of _steady_parents to use
+        self._termination = None #TerminationCriterion of the current run, see evolve_until
+        self._stop_reason = None #Why the last run stopped
+
+    def add_observer(self, observer):
+        """ Register an observer notified after each generation (see ga_monitor.GenerationObserver)
+        - observer.on_generation(statistics) receives a dict with the keys of GENERATION_STATISTICS
+          (phase timings, best/mean/worst fitness, diversity, evaluations and cache hits of the generation)
+        - if it returns True, evolve_until stops after this generation
+
+        Args:
+            observer (object): object with an on_generation method
+        """
+        self._observers.append(observer)
+
+    def add_controller(self, controller):
+        """ Register a controller adapting the solver after each generation (see ga_adaptive.AdaptiveController)
+        - controller.on_generation(solver, statistics) receives the solver and the statistics of the generation,
+          before the observers, and can change the mutation rate, the operators of the problem or the population size
+
+        Args:
+            controller (object): object with an on_generation method
+        """
+        self._controllers.append(controller)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """ Shut down the worker pool, if any (a new one is created if the solver is used again) """
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _get_pool(self):
+        """ Create the worker pool on first use """
+        if self._pool is None:
+            if self._executor == 'thread':
+                self._pool = ThreadPoolExecutor(self._workers)
+            else:
+                self._pool = ProcessPoolExecutor(self._workers, initializer=_init_worker, initargs=(self._problem,))
+        return self._pool
+
+    def get_nb_evaluations(self):
+        """ Return the number of fitness evaluations computed since the solver was created (cache hits excluded) """
+        return self._nb_evaluations
+
+    def get_problem(self):
+        """ Return the GAProblem solved """
+        return self._problem
+
+    def get_mutation_rate(self):
+        """ Return the current mutation rate """
+        return self._mutation_rate
+
+    def set_mutation_rate(self, mutation_rate):
+        """ Change the mutation rate used from the next generation on (see ga_adaptive) """
+        self._mutation_rate = mutation_rate
+
+    def get_generation(self):
+        """ Return the number of generations evolved since the solver was created """
+        return self._generation
+
+    def get_cache_statistics(self):
+        """ Return the hits, misses and size of the fitness cache as a dict (None if the solver has no cache) """
+        if self._cache is None:
+            return None
+        return {'hits': self._cache.hits, 'misses': self._cache.misses, 'size': len(self._cache), 'max_size': self._cache.max_size}
+
+    def _evaluate(self, chromosomes):
+        """ Calculate the fitness of all the given chromosomes as one batch
+        - With a cache, only the chromosomes never seen before are evaluated (once per distinct canonical chromosome)
+
+        Args:
+            chromosomes (list or ndarray): list of chromosomes, or 2-D array in vectorized mode
+
+        Returns:
+            list or ndarray: the fitnesses, in the order of chromosomes
+        """
+        if self._cache is None:
+            return self._evaluate_all(chromosomes)
+        keys = [self._problem.canonical_chromosome(chromosome) for chromosome in chromosomes]
+        found, missing = self._cache.lookup(keys)
+        first_positions = [positions[0] for positions in missing.values()]
+        if self._vectorized:
+            new_fitnesses = self._evaluate_all(chromosomes[first_positions])
+        else:
+            new_fitnesses = self._evaluate_all([chromosomes[i] for i in first_positions])
+        fitnesses = [None]*len(keys)
+        for i, fitness in found.items():
+            fitnesses[i] = fitness
+        for (key, positions), fitness in zip(missing.items(), new_fitnesses):
+            self._cache.store(key, fitness)
+            for i in positions:
+                fitnesses[i] = fitness
+        if self._vectorized:
+            return np.array(fitnesses, dtype=float)
+        return fitnesses
+
+    def _evaluate_all(self, chromosomes):
+        """ Calculate the fitness of all the given chromosomes, sent to the workers chunk by chunk
+        - Chunks are gathered back in order, so the result does not depend on the executor
+
+        Args:
+            chromosomes (list or ndarray): list of chromosomes, or 2-D array in vectorized mode
+
+        Returns:
+            list or ndarray: the fitnesses, in the order of chromosomes
+        """
+        self._nb_evaluations += len(chromosomes)
+        if self._executor == 'serial' or len(chromosomes) == 0:
+            return _fitness_chunk(self._problem, self._vectorized, chromosomes)
+        chunk_size = self._chunk_size or -(-len(chromosomes) // (4*self._workers)) #Ceil division
+        chunks = [chromosomes[i:i+chunk_size] for i in range(0, len(chromosomes), chunk_size)]
+        problem = self._problem if self._executor == 'thread' else None #Process workers already have their own copy
+        results = list(self._get_pool().map(partial(_fitness_chunk, problem, self._vectorized), chunks))
+        if self._vectorized:
+            return np.concatenate(results)
+        return [fitness for chunk in results for fitness in chunk]
 
     def reset_population(self, pop_size=50):
         """ Initialize the population with pop_size random Individuals 
@@ -93,11 +496,54 @@ class GASolver:
         Args:
             pop_size (int, optional): number of Individuals initialized
         """
-        for i in range(pop_size):
-            chromosome = self._problem.problem_chromosome() #Call problem_chromosome to create a chromosome (problem-specific)
-            fitness = self._problem.problem_fitness(chromosome) #Calculate fitness of th chromosome
-            new_individual = Individual(chromosome, fitness) #Create a new individual
-            self._population.append(new_individual) #Update the population list
+        if self._vectorized:
+            self._chromosomes = None
+        else:
+            self._population = [] #Replaced, not extended, like in vectorized mode
+        self._add_random_individuals(pop_size)
+        self._update_best()
+
+    def _add_random_individuals(self, nb_individuals):
+        """ Add nb_individuals random Individuals to the population """
+        if self._vectorized:
+            chromosomes = np.asarray(self._problem.batch_chromosomes(nb_individuals, self._problem.rng))
+            fitnesses = self._evaluate(chromosomes)
+            if self._chromosomes is None:
+                self._chromosomes, self._fitnesses = chromosomes, fitnesses
+            else:
+                self._chromosomes = np.concatenate((self._chromosomes, chromosomes))
+                self._fitnesses = np.concatenate((self._fitnesses, fitnesses))
+            return
+        chromosomes = [self._problem.problem_chromosome() for i in range(nb_individuals)] #Call problem_chromosome to create the chromosomes (problem-specific)
+        fitnesses = self._evaluate(chromosomes) #Calculate fitness of the chromosomes
+        for chromosome, fitness in zip(chromosomes, fitnesses):
+            self._population.append(Individual(chromosome, fitness)) #Create a new individual and update the population list
+
+    def resize_population(self, pop_size):
+        """ Change the size of the population: the worst Individuals are removed, or new random Individuals are added (see ga_adaptive)
+
+        Args:
+            pop_size (int): new number of Individuals
+        """
+        fitnesses = self.get_fitnesses()
+        if pop_size < len(fitnesses):
+            kept = np.sort(top_indices(fitnesses, pop_size)) #The best ones, in their order in the population
+            if self._vectorized:
+                self._chromosomes, self._fitnesses = self._chromosomes[kept], self._fitnesses[kept]
+            else:
+                self._population = [self._population[i] for i in kept]
+        elif pop_size > len(fitnesses):
+            self._add_random_individuals(pop_size - len(fitnesses))
+        self._update_best()
+
+    def _update_best(self, fitnesses=None):
+        """ Find the position of the best Individual after the population changed
+
+        Args:
+            fitnesses (ndarray, optional): fitnesses of the population, if already at hand
+        """
+        fitnesses = self.get_fitnesses() if fitnesses is None else fitnesses
+        self._best_index = int(np.argmax(fitnesses)) if len(fitnesses) else None
 
     def evolve_for_one_generation(self):
         """ Apply the process for one generation : 
@@ -108,46 +554,537 @@ class GASolver:
             -	Mutation: For each new Individual, mutate with probability 
                 mutation_rate i.e., mutate it if a random value is below   
                 mutation_rate
+            -   Improvement: Let the problem improve each new Individual (see GAProblem.improvement)
+            -   Fitness: Evaluate all the new chromosomes as one batch (see executor)
+        Then the observers, if any, are notified with the statistics of the generation
+        """
+        self._start_generation()
+        evaluations, cache_hits = self._nb_evaluations, self._cache.hits if self._cache else 0
+        start = time.perf_counter()
+        if self._vectorized:
+            self._evolve_arrays()
+        else:
+            self._evolve_individuals()
+        self._generation += 1
+        self._notify_observers(start, evaluations, cache_hits)
+
+    def _start_generation(self):
+        """ Reset the phase timings and the success counters at the beginning of a generation """
+        self._phase_times = dict.fromkeys(PHASES, 0.0)
+        self._nb_children = 0
+        self._nb_successes = 0
+
+    def _count_successes(self, children_fitnesses, parents_fitnesses):
+        """ Count the children better than both their parents (success rate of the generation, see ga_adaptive)
+
+        Args:
+            children_fitnesses (list or ndarray): fitness of each child
+            parents_fitnesses (ndarray): best fitness of the two parents of each child
         """
-        self._population.sort(reverse=True) #Sort the population
-        selected_population=self._population[:round(len(self._population)*self._selection_rate)] #Select the best adapted part of the population
+        self._nb_children += len(parents_fitnesses)
+        self._nb_successes += int(np.count_nonzero(np.asarray(children_fitnesses, dtype=float) > parents_fitnesses))
 
-        while len(selected_population) < len(self._population): #Iteration until the size of population back to its initial size
-            a=random.choice(selected_population) #Chose randomly a parent "a"
-            b=random.choice(selected_population) #Chose randomly a parent "b"
-            if a==b: #Check is parent "a" is same as "b"
-                continue #Skip the iteration for these parents
+    def _notify_observers(self, start, evaluations, cache_hits):
+        """ Send the statistics of the generation that began at time "start" to the controllers, then to the observers
+
+        Args:
+            start (float): time.perf_counter() at the beginning of the generation
+            evaluations (int): number of evaluations at the beginning of the generation
+            cache_hits (int): number of cache hits at the beginning of the generation
+        """
+        if self._observers or self._controllers:
+            statistics = self._generation_statistics(time.perf_counter() - start)
+            statistics['evaluations'] = self._nb_evaluations - evaluations
+            statistics['cache_hits'] = (self._cache.hits if self._cache else 0) - cache_hits
+            for controller in self._controllers:
+                controller.on_generation(self, statistics)
+            for observer in self._observers:
+                if observer.on_generation(statistics):
+                    self._stop_requested = True
+
+    def _tick(self, phase, since):
+        """ Add the time elapsed since "since" to a phase of the current generation and return the current time """
+        now = time.perf_counter()
+        self._phase_times[phase] += now - since
+        return now
+
+    def _evolve_individuals(self):
+        """ Process of evolve_for_one_generation, one Individual at a time """
+        tick = time.perf_counter()
+        fitnesses = self.get_fitnesses()
+        survivors, parents_a, parents_b = self._selection.select(fitnesses, self._selection_rate, self._rng) #Select the survivors and the parents of the children (see ga_selection)
+        selected_population = [self._population[i] for i in survivors]
+        self._tick('selection', tick)
+
+        children = self._breed(parents_a, parents_b)
+        tick = time.perf_counter()
+        children_fitnesses = self._evaluate(children) #Call the problem_fitness (problem-specific) on the whole offspring
+        self._count_successes(children_fitnesses, np.maximum(fitnesses[parents_a], fitnesses[parents_b]))
+        for new_chrom, fitness in zip(children, children_fitnesses):
+            selected_population.append(Individual(new_chrom, fitness)) #Create a new individual and update the population with it
+
+        self._population = selected_population #Replace the old population by the new one
+        self._update_best(np.concatenate((fitnesses[survivors], np.asarray(children_fitnesses, dtype=float))))
+        self._tick('fitness', tick)
+
+    def _breed(self, parents_a, parents_b):
+        """ Reproduction, mutation and improvement of one child per pair of parents
+
+        Args:
+            parents_a (ndarray): index of the first parent of each child in the population
+            parents_b (ndarray): index of the second parent of each child
+
+        Returns:
+            list or ndarray: the children, as a list of chromosomes or a 2-D array in vectorized mode
+        """
+        tick = time.perf_counter()
+        rng = self._problem.rng
+        mutate = self._rng.random(len(parents_a)) < self._mutation_rate #Children to mutate, drawn for all of them at once
+        if self._vectorized:
+            children = np.asarray(self._problem.batch_reproduction(self._chromosomes[parents_a], self._chromosomes[parents_b], rng))
+            tick = self._tick('reproduction', tick)
+            if mutate.any():
+                children[mutate] = self._problem.batch_mutation(children[mutate], rng)
+            tick = self._tick('mutation', tick)
+            children = np.asarray(self._problem.batch_improvement(children, rng))
+            self._tick('improvement', tick)
+            return children
+
+        children = []
+        for i_a, i_b, mutated in zip(parents_a.tolist(), parents_b.tolist(), mutate.tolist()): #One child per pair of parents, always two different Individuals
+            a = self._population[i_a]
+            b = self._population[i_b]
 
             new_chrom=self._problem.reproduction(a, b) #Call reproduction (problem-specific)
+            tick = self._tick('reproduction', tick)
 
-            number = random.random() #Get a random number between 0 and 1.0
-            if number<self._mutation_rate: #Check if the number is smaller than the mutation rate
+            if mutated: #Mutate with probability mutation_rate
                 new_chrom=self._problem.mutation(new_chrom, len(a.chromosome)) #Call mutation (problem-specific)
+            tick = self._tick('mutation', tick)
 
-            fitness=self._problem.problem_fitness(new_chrom) #Call the problem_fitness (problem-specific) 
-            new_individual=Individual(new_chrom, fitness) #Create a new individual
-            selected_population.append(new_individual) #Update the population with the new individual
-        
-        self._population = selected_population #Replace the old population by the new one
+            new_chrom=self._problem.improvement(new_chrom) #Call improvement (problem-specific, optional)
+            tick = self._tick('improvement', tick)
+
+            children.append(new_chrom)
+        return children
+
+    def _evolve_arrays(self):
+        """ Process of evolve_for_one_generation, applied to the whole array-backed population at once """
+        tick = time.perf_counter()
+        survivors, parents_a, parents_b = self._selection.select(self._fitnesses, self._selection_rate, self._rng) #See ga_selection
+        chromosomes = self._chromosomes[survivors]
+        fitnesses = self._fitnesses[survivors]
+        self._tick('selection', tick)
+
+        if len(parents_a) > 0:
+            children = self._breed(parents_a, parents_b)
+            tick = time.perf_counter()
+            children_fitnesses = self._evaluate(children)
+            self._count_successes(children_fitnesses, np.maximum(self._fitnesses[parents_a], self._fitnesses[parents_b]))
+            self._tick('fitness', tick)
+            chromosomes = np.concatenate((chromosomes, children))
+            fitnesses = np.concatenate((fitnesses, children_fitnesses))
+
+        self._chromosomes = chromosomes
+        self._fitnesses = fitnesses
+        self._update_best(fitnesses)
+
+    def evolve_steady_state(self, max_nb_of_evaluations=25000, threshold_fitness=None, max_pending=None, termination=None):
+        """ Evolve without generations: children are created a few at a time, and each one, as soon as its fitness is known,
+        replaces the worst Individual of the population if it is better. With a 'thread' or 'process' executor,
+        up to max_pending children are evaluated at the same time, and a new child is created each time one finishes,
+        so workers never wait for the slowest evaluation of a generation (the run then depends on the order in which they finish).
+        Stops when max_nb_of_evaluations children were evaluated (cache hits included), when the fitness of the best
+        Individual reaches threshold_fitness, when an observer asked to stop, or on the termination criteria.
+        Observers and termination criteria are checked every "population size" children.
+
+        Args:
+            max_nb_of_evaluations (int, optional): number of children to evaluate. Defaults to 25000.
+            threshold_fitness (float, optional): stop as soon as the best Individual reaches this fitness. Defaults to None.
+            max_pending (int, optional): maximum number of children being evaluated at the same time.
+                Defaults to None (1 with the 'serial' executor, twice the number of workers otherwise).
+            termination (TerminationCriterion or list, optional): see evolve_until. Defaults to None.
+
+        Returns:
+            str: why the run stopped (see get_stop_reason)
+        """
+        self._start_termination(termination)
+        if max_pending is None:
+            max_pending = 1 if self._executor == 'serial' else 2*self._workers
+        pending = {} #Future of each child being evaluated by a worker -> (child, best fitness of its parents)
+        ready = [] #(child, fitness, best fitness of its parents) waiting to be inserted
+        nb_created, nb_inserted = 0, 0
+        self._start_generation()
+        self._start_steady_state_generation()
+        evaluations, cache_hits = self._nb_evaluations, self._cache.hits if self._cache else 0
+        start = time.perf_counter()
+        while nb_inserted < max_nb_of_evaluations:
+            nb_new = min(max_pending - len(pending) - len(ready), max_nb_of_evaluations - nb_created)
+            if nb_new > 0:
+                parents_a, parents_b = self._steady_state_parents(nb_new)
+                parents_fitnesses = [max(self._fitness_of(i_a), self._fitness_of(i_b)) for i_a, i_b in zip(parents_a.tolist(), parents_b.tolist())]
+                for child, parents_fitness in zip(self._breed(parents_a, parents_b), parents_fitnesses):
+                    self._submit_child(child, parents_fitness, pending, ready)
+                nb_created += nb_new
+            tick = time.perf_counter()
+            if pending and not ready:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    child, parents_fitness = pending.pop(future)
+                    fitness = future.result()[0]
+                    self._nb_evaluations += 1
+                    if self._cache is not None:
+                        self._cache.store(self._problem.canonical_chromosome(child), fitness)
+                    ready.append((child, fitness, parents_fitness))
+            self._tick('fitness', tick)
+            while ready:
+                child, fitness, parents_fitness = ready.pop(0)
+                self._count_successes([fitness], np.array([parents_fitness]))
+                self._replace_worst(child, fitness)
+                nb_inserted += 1
+                generation_done = self._nb_children >= len(self._worst_heap) #One generation worth of children
+                if generation_done:
+                    self._generation += 1
+                    self._notify_observers(start, evaluations, cache_hits)
+                    self._start_generation()
+                    self._start_steady_state_generation() #The controllers may have changed the population
+                    evaluations, cache_hits = self._nb_evaluations, self._cache.hits if self._cache else 0
+                    start = time.perf_counter()
+                self._stop_reason = self._check_termination(threshold_fitness, generation_done)
+                if self._stop_reason is not None:
+                    for future in pending:
+                        future.cancel()
+                    return self._stop_reason
+        self._stop_reason = f"max_nb_of_evaluations: {nb_inserted} children evaluated"
+        return self._stop_reason
+
+    def _start_steady_state_generation(self):
+        """ Build the heap of the fitnesses of the population used by evolve_steady_state to find the worst Individual,
+        and forget the parents drawn for the previous generation """
+        self._worst_heap = [(fitness, i) for i, fitness in enumerate(self.get_fitnesses().tolist())] #(fitness, index), the worst first
+        heapq.heapify(self._worst_heap)
+        self._steady_parents = None
+        self._next_parents = 0
+
+    def _fitness_of(self, index):
+        """ Fitness of the Individual at this index of the population """
+        return float(self._fitnesses[index]) if self._vectorized else self._population[index].fitness
+
+    def _steady_state_parents(self, nb_children):
+        """ Pairs of parents of the next nb_children children of evolve_steady_state: the selection strategy draws the pairs
+        of a whole generation worth of children at once, and they are used a few at a time """
+        if self._steady_parents is None or self._next_parents + nb_children > len(self._steady_parents[0]):
+            tick = time.perf_counter()
+            _, parents_a, parents_b = self._selection.select(self.get_fitnesses(), self._selection_rate, self._rng)
+            if len(parents_a) == 0:
+                raise ValueError("the selection strategy creates no children with this selection_rate")
+            nb_pairs = max(len(self._worst_heap), nb_children)
+            self._steady_parents = (np.resize(parents_a, nb_pairs), np.resize(parents_b, nb_pairs)) #Pairs are reused if more children are needed
+            self._next_parents = 0
+            self._tick('selection', tick)
+        start, self._next_parents = self._next_parents, self._next_parents + nb_children
+        return self._steady_parents[0][start:self._next_parents], self._steady_parents[1][start:self._next_parents]
+
+    def _submit_child(self, child, parents_fitness, pending, ready):
+        """ Start the evaluation of a child of evolve_steady_state: from the cache if possible, in the calling thread with
+        the 'serial' executor (added to ready), else by a worker of the pool (added to pending) """
+        if self._cache is not None:
+            found, _ = self._cache.lookup([self._problem.canonical_chromosome(child)])
+            if found:
+                ready.append((child, found[0], parents_fitness))
+                return
+        chunk = child[None] if self._vectorized else [child]
+        if self._executor == 'serial':
+            fitness = _fitness_chunk(self._problem, self._vectorized, chunk)[0]
+            self._nb_evaluations += 1
+            if self._cache is not None:
+                self._cache.store(self._problem.canonical_chromosome(child), fitness)
+            ready.append((child, fitness, parents_fitness))
+            return
+        problem = self._problem if self._executor == 'thread' else None #Process workers already have their own copy
+        pending[self._get_pool().submit(_fitness_chunk, problem, self._vectorized, chunk)] = (child, parents_fitness)
+
+    def _replace_worst(self, chromosome, fitness):
+        """ Put a child in the place of the worst Individual of the population, if it is better
+        (the worst one is at the top of the heap built by _start_steady_state_generation, kept up to date here) """
+        fitness = float(fitness)
+        worst_fitness, worst = self._worst_heap[0]
+        if fitness <= worst_fitness:
+            return
+        heapq.heapreplace(self._worst_heap, (fitness, worst))
+        if self._vectorized:
+            self._chromosomes[worst] = chromosome
+            self._fitnesses[worst] = fitness
+        else:
+            self._population[worst] = Individual(chromosome, fitness)
+        if fitness > self.get_best_fitness():
+            self._best_index = worst
+
+    def _generation_statistics(self, total_time):
+        """ Statistics of the current generation sent to the observers (evaluations and cache hits are added by the caller) """
+        fitnesses = self.get_fitnesses()
+        statistics = {'generation': self._generation, 'time_total': total_time}
+        statistics.update((f'time_{phase}', elapsed) for phase, elapsed in self._phase_times.items())
+        statistics.update(best_fitness=float(fitnesses.max()), mean_fitness=float(fitnesses.mean()),
+                          worst_fitness=float(fitnesses.min()), diversity=self.get_diversity(),
+                          success_rate=self._nb_successes / self._nb_children if self._nb_children else 0.0,
+                          mutation_rate=self._mutation_rate, pop_size=len(fitnesses))
+        return statistics
+
+    def get_diversity(self):
+        """ Estimate the diversity of the population: average fraction of genes that differ from the best chromosome,
+        over up to DIVERSITY_SAMPLE chromosomes evenly spread in the population (0 when the population has collapsed on one chromosome)
+        """
+        if self._vectorized:
+            step = max(1, len(self._chromosomes) // DIVERSITY_SAMPLE)
+            best = self._chromosomes[self._best_index]
+            return float((self._chromosomes[::step] != best).mean())
+        step = max(1, len(self._population) // DIVERSITY_SAMPLE)
+        best = self._population[self._best_index].chromosome
+        differences = [sum(x != y for x, y in zip(individual.chromosome, best)) / max(1, len(best)) for individual in self._population[::step]]
+        return float(np.mean(differences))
 
     def show_generation_summary(self):
         """ Print some debug information on the current state of the population """
-        print(self._population)
-        print(len(self._population))
+        fitnesses = self.get_fitnesses()
+        print(f"Generation {self._generation}: {len(fitnesses)} individuals, fitness best {fitnesses.max():.1f} "
+              f"mean {fitnesses.mean():.1f} worst {fitnesses.min():.1f}, diversity {self.get_diversity():.2f}, "
+              f"{self._nb_evaluations} evaluations")
         print(self._problem)
         
     def get_best_individual(self):
-        """ Return the best Individual of the population - best fitness is the best Individual (see Individual.__lt__ method)"""
-        self._population.sort(reverse=True)
-        return self._population[0]
+        """ Return the best Individual of the population - best fitness is the best Individual (see Individual.__lt__ method)
+        The best one is tracked at each change of the population, no sort is needed.
+        Its chromosome is decoded from the compact form (see GAProblem.decode_chromosome) """
+        if self._vectorized:
+            return Individual(self._problem.decode_chromosome(self._chromosomes[self._best_index]), float(self._fitnesses[self._best_index]))
+        best = self._population[self._best_index]
+        return Individual(self._problem.decode_chromosome(best.chromosome), best.fitness)
+
+    def get_best_fitness(self):
+        """ Return the fitness of the best Individual of the population, in constant time """
+        if self._vectorized:
+            return float(self._fitnesses[self._best_index])
+        return self._population[self._best_index].fitness
+
+    def get_fitnesses(self):
+        """ Return the fitnesses of the whole population as a 1-D float array """
+        if self._vectorized:
+            return self._fitnesses.copy()
+        return np.array([individual.fitness for individual in self._population], dtype=float)
+
+    def select_emigrants(self, k):
+        """ Return copies of the k best chromosomes and their fitnesses (used for migration between populations)
+
+        Args:
+            k (int): number of chromosomes to return
+
+        Returns:
+            tuple: (chromosomes, fitnesses) - a 2-D array and a 1-D array in vectorized mode, two lists otherwise
+        """
+        best = top_indices(self.get_fitnesses(), k)
+        if self._vectorized:
+            return self._chromosomes[best], self._fitnesses[best] #Fancy indexing already copies
+        return [copy.copy(self._population[i].chromosome) for i in best], [self._population[i].fitness for i in best]
+
+    def receive_immigrants(self, chromosomes, fitnesses):
+        """ Replace the worst Individuals of the population by the given ones (used for migration between populations)
+
+        Args:
+            chromosomes (list or ndarray): chromosomes coming from another population (as returned by select_emigrants)
+            fitnesses (list or ndarray): their fitnesses
+        """
+        nb_immigrants = min(len(fitnesses), len(self.get_fitnesses()))
+        if nb_immigrants == 0:
+            return
+        if self._vectorized:
+            worst = top_indices(-self._fitnesses, nb_immigrants)
+            self._chromosomes[worst] = np.asarray(chromosomes)[:nb_immigrants]
+            self._fitnesses[worst] = np.asarray(fitnesses, dtype=float)[:nb_immigrants]
+        else:
+            worst = top_indices(-self.get_fitnesses(), nb_immigrants)
+            for i, chromosome, fitness in zip(worst, chromosomes, fitnesses):
+                self._population[i] = Individual(chromosome, fitness)
+        self._update_best()
+
+    def _checkpoint_state(self):
+        """ Snapshot of everything needed to continue the run, as arrays ready to be written by numpy.savez """
+        if self._vectorized:
+            chromosomes, fitnesses = self._chromosomes.copy(), self._fitnesses.copy()
+        else:
+            chromosomes = np.array([individual.chromosome for individual in self._population])
+            fitnesses = self.get_fitnesses()
+        if chromosomes.dtype == object:
+            raise ValueError("checkpoints need chromosomes of the same length made of numbers or strings")
+        parameters = {'format': CHECKPOINT_FORMAT, 'selection_rate': self._selection_rate, 'mutation_rate': self._mutation_rate,
+                      'vectorized': self._vectorized, 'generation': self._generation, 'nb_evaluations': self._nb_evaluations, 'run': self._run}
+        return {'chromosomes': chromosomes, 'fitnesses': fitnesses,
+                'parameters': np.array(json.dumps(parameters)),
+                'rng_state': np.array(json.dumps(self._rng.bit_generator.state)),
+                'problem_rng_state': np.array(json.dumps(self._problem.rng.bit_generator.state)),
+                'operators': np.array(json.dumps({name: getattr(self._problem, name) for name in self._problem.operator_variants()})),
+                'controllers': np.array(json.dumps([controller.get_state() if hasattr(controller, 'get_state') else None
+                                                    for controller in self._controllers]))}
+
+    @staticmethod
+    def _write_checkpoint(filename, state):
+        """ Write a checkpoint state to a temporary file, then rename it, so an interrupted write never corrupts the previous checkpoint """
+        temporary = f"{filename}.tmp"
+        with open(temporary, 'wb') as file:
+            np.savez(file, **state)
+        os.replace(temporary, filename)
+
+    def wait_checkpoint(self):
+        """ Wait for the checkpoint being written in the background, if any """
+        if self._checkpoint_thread is not None:
+            self._checkpoint_thread.join()
+            self._checkpoint_thread = None
+
+    def save_checkpoint(self, filename, background=False):
+        """ Save the state of the solver in a .npz file: population chromosomes and fitnesses, random generators states,
+        generation counter, parameters and progress of the current evolve_until run, operators of the problem
+        (see GAProblem.operator_variants) and state of the controllers
 
-    def evolve_until(self, max_nb_of_generations=500, threshold_fitness=None):
-        """ Launch the evolve_for_one_generation function until one of the two condition is achieved : 
+        Args:
+            filename (str): checkpoint file
+            background (bool, optional): write the file from a background thread (the state is copied first,
+                the generation loop can go on while it is written). Defaults to False.
+        """
+        self.wait_checkpoint() #Only one checkpoint written at a time
+        state = self._checkpoint_state()
+        if background:
+            self._checkpoint_thread = threading.Thread(target=self._write_checkpoint, args=(filename, state), daemon=True)
+            self._checkpoint_thread.start()
+        else:
+            self._write_checkpoint(filename, state)
+
+    def load_checkpoint(self, filename):
+        """ Restore the state saved by save_checkpoint (the solver must be created with the same problem, and the same controllers in the same order)
+
+        Args:
+            filename (str): checkpoint file
+        """
+        with np.load(filename, allow_pickle=False) as checkpoint:
+            parameters = json.loads(str(checkpoint['parameters']))
+            if parameters['format'] != CHECKPOINT_FORMAT:
+                raise ValueError(f"unsupported checkpoint format {parameters['format']}")
+            if parameters['vectorized'] != self._vectorized:
+                raise ValueError("the checkpoint was written by a solver in a different population mode")
+            controller_states = json.loads(str(checkpoint['controllers']))
+            if len(controller_states) != len(self._controllers):
+                raise ValueError(f"the checkpoint was written by a solver with {len(controller_states)} controllers, not {len(self._controllers)}")
+            chromosomes, fitnesses = checkpoint['chromosomes'], checkpoint['fitnesses']
+            self._rng.bit_generator.state = json.loads(str(checkpoint['rng_state']))
+            self._problem.rng.bit_generator.state = json.loads(str(checkpoint['problem_rng_state']))
+            operators = json.loads(str(checkpoint['operators']))
+        for controller, state in zip(self._controllers, controller_states):
+            if state is not None:
+                controller.set_state(state)
+        for name, value in operators.items(): #Operators chosen by the controllers (see ga_adaptive.OperatorBandit)
+            setattr(self._problem, name, value)
+        if self._vectorized:
+            self._chromosomes, self._fitnesses = chromosomes, fitnesses
+        else:
+            self._population = [Individual(self._problem.chromosome_from_row(row), fitness) for row, fitness in zip(chromosomes, fitnesses.tolist())]
+        self._selection_rate = parameters['selection_rate']
+        self._mutation_rate = parameters['mutation_rate']
+        self._generation = parameters['generation']
+        self._nb_evaluations = parameters['nb_evaluations']
+        self._run = parameters['run']
+        self._update_best()
+
+    def resume(self, filename, termination=None):
+        """ Load a checkpoint written during evolve_until and continue the run exactly where it stopped,
+        with the same stopping conditions and checkpoints (see evolve_until)
+
+        Args:
+            filename (str): checkpoint file
+            termination (TerminationCriterion or list, optional): termination criteria of the run, they are not saved
+                in the checkpoint and start again from the resumed generation. Defaults to None.
+
+        Returns:
+            str: why the run stopped (see get_stop_reason)
+        """
+        self.load_checkpoint(filename)
+        if self._run is None:
+            raise ValueError("the checkpoint was not written during evolve_until, there is no run to resume")
+        return self._run_generations(filename, termination)
+
+    def evolve_until(self, max_nb_of_generations=500, threshold_fitness=None, checkpoint_file=None, checkpoint_interval=100, termination=None):
+        """ Launch the evolve_for_one_generation function until one of the conditions is achieved : 
             - Max nb of generation is achieved
             - The fitness of the best Individual is greater than or equal to
               threshold_fitness
+            - An observer asked to stop (its on_generation returned True)
+            - A termination criterion is met (see ga_termination: stagnation, diversity collapse, time or evaluation budget...)
+        With a checkpoint_file, the state is saved in the background every checkpoint_interval generations and at the end,
+        and the run can be continued after a crash with resume(checkpoint_file)
+        In steady-state mode (see evolve_steady_state), max_nb_of_generations is a budget of
+        max_nb_of_generations * population size children, and checkpoints are not available
+
+        Args:
+            termination (TerminationCriterion or list, optional): criterion checked after each generation,
+                a list is the same as AnyOf(*list). Defaults to None.
+
+        Returns:
+            str: why the run stopped (see get_stop_reason)
         """
-        for i in range(max_nb_of_generations): #Iteration until the max nb of generation is reached
+        if self._steady_state:
+            if checkpoint_file is not None:
+                raise ValueError("checkpoints are not available in steady-state mode")
+            return self.evolve_steady_state(max_nb_of_generations*len(self.get_fitnesses()), threshold_fitness, termination=termination)
+        self._run = {'max_nb_of_generations': max_nb_of_generations, 'threshold_fitness': threshold_fitness,
+                     'checkpoint_interval': checkpoint_interval, 'done': 0}
+        return self._run_generations(checkpoint_file, termination)
+
+    def get_stop_reason(self):
+        """ Return why the last run (evolve_until, evolve_steady_state or resume) stopped, e.g. "stagnation: no improvement for 50 generations" """
+        return self._stop_reason
+
+    def _start_termination(self, termination):
+        """ Install the termination criteria of a new run """
+        if termination is not None and not isinstance(termination, TerminationCriterion):
+            termination = AnyOf(*termination)
+        self._termination = termination
+        if termination is not None:
+            termination.start(self)
+        self._stop_requested = False
+        self._stop_reason = None
+
+    def _check_termination(self, threshold_fitness, generation_done=True):
+        """ Check the stopping conditions of the run after a generation (or a steady-state child)
+
+        Args:
+            threshold_fitness (float): fitness to reach, or None
+            generation_done (bool, optional): False to check only the threshold. Defaults to True.
+
+        Returns:
+            str: why the run must stop, or None to go on
+        """
+        if threshold_fitness is not None and self.get_best_fitness() >= threshold_fitness: #Check if the best individual is good enough
+            return f"threshold: best fitness {self.get_best_fitness()} >= {threshold_fitness}"
+        if not generation_done:
+            return None
+        if self._stop_requested: #Check if an observer asked to stop
+            return "observer: an observer asked to stop"
+        if self._termination is not None:
+            return self._termination.check(self)
+        return None
+
+    def _run_generations(self, checkpoint_file, termination=None):
+        """ Generation loop of evolve_until, starting from the progress saved in self._run """
+        self._start_termination(termination)
+        run = self._run
+        for i in range(run['done'], run['max_nb_of_generations']): #Iteration until the max nb of generation is reached
             self.evolve_for_one_generation() #Call evolve_for_one_generation
-            if self.get_best_individual().fitness == threshold_fitness: #Check if the best individual is goog enough
-                break #End the solving
\ No newline at end of file
+            run['done'] = i + 1
+            if checkpoint_file is not None and run['done'] % run['checkpoint_interval'] == 0:
+                self.save_checkpoint(checkpoint_file, background=True)
+            self._stop_reason = self._check_termination(run['threshold_fitness'])
+            if self._stop_reason is not None:
+                break #End the solving
+        else:
+            self._stop_reason = f"max_nb_of_generations: {run['max_nb_of_generations']} generations"
+        if checkpoint_file is not None:
+            self.save_checkpoint(checkpoint_file)
+        return self._stop_reason
\ No newline at end of file
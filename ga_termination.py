@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Termination criteria for ga_solver
+
+A termination criterion is checked by GASolver.evolve_until after each generation: its check method returns None
+to go on, or a short text telling why the run must stop, reported by GASolver.get_stop_reason.
+Criteria are combined with AnyOf (stop as soon as one of them is met) and AllOf (stop when all of them are met),
+so a run can stop on convergence instead of spending most of its time on generations that no longer improve anything.
+"""
+import time
+
+
+class TerminationCriterion:
+    """Base class of the termination criteria: child classes implement check, and start if they keep a state"""
+
+    def start(self, solver):
+        """Called at the beginning of each run (evolve_until or resume), to reset the state of the criterion
+
+        Args:
+            solver (GASolver): the solver about to run
+        """
+        pass
+
+    def check(self, solver):
+        """Called after each generation
+
+        Args:
+            solver (GASolver): the solver running
+
+        Returns:
+            str: why the run must stop, or None to go on
+        """
+        raise NotImplementedError
+
+
+class FitnessThreshold(TerminationCriterion):
+    """Stop when the best fitness is greater than or equal to a threshold"""
+
+    def __init__(self, threshold):
+        """
+        Args:
+            threshold (float): fitness to reach
+        """
+        self.threshold = threshold
+
+    def check(self, solver):
+        best = solver.get_best_fitness()
+        if best >= self.threshold:
+            return f"threshold: best fitness {best} >= {self.threshold}"
+        return None
+
+
+class Stagnation(TerminationCriterion):
+    """Stop when the best fitness did not improve by more than min_improvement for nb_generations generations"""
+
+    def __init__(self, nb_generations, min_improvement=0.0):
+        """
+        Args:
+            nb_generations (int): number of generations without improvement before stopping
+            min_improvement (float, optional): smaller gains of the best fitness are not counted as improvements. Defaults to 0.0.
+        """
+        self.nb_generations = nb_generations
+        self.min_improvement = min_improvement
+        self._best = None #Best fitness at the last improvement
+        self._since = 0 #Generations since the last improvement
+
+    def start(self, solver):
+        self._best = solver.get_best_fitness()
+        self._since = 0
+
+    def check(self, solver):
+        best = solver.get_best_fitness()
+        if best > self._best + self.min_improvement:
+            self._best = best
+            self._since = 0
+            return None
+        self._since += 1
+        if self._since >= self.nb_generations:
+            return f"stagnation: no improvement for {self._since} generations"
+        return None
+
+
+class DiversityCollapse(TerminationCriterion):
+    """Stop when the diversity of the population (see GASolver.get_diversity) falls to min_diversity or below"""
+
+    def __init__(self, min_diversity=0.01):
+        """
+        Args:
+            min_diversity (float, optional): diversity under which the population has collapsed. Defaults to 0.01.
+        """
+        self.min_diversity = min_diversity
+
+    def check(self, solver):
+        diversity = solver.get_diversity()
+        if diversity <= self.min_diversity:
+            return f"diversity collapse: diversity {diversity:.4f} <= {self.min_diversity}"
+        return None
+
+
+class TimeBudget(TerminationCriterion):
+    """Stop when the run has lasted max_seconds (wall-clock time)"""
+
+    def __init__(self, max_seconds):
+        """
+        Args:
+            max_seconds (float): time budget of the run, in seconds
+        """
+        self.max_seconds = max_seconds
+        self._start = None
+
+    def start(self, solver):
+        self._start = time.perf_counter()
+
+    def check(self, solver):
+        elapsed = time.perf_counter() - self._start
+        if elapsed >= self.max_seconds:
+            return f"time budget: {elapsed:.1f} s >= {self.max_seconds} s"
+        return None
+
+
+class EvaluationBudget(TerminationCriterion):
+    """Stop when the run has computed max_evaluations fitness evaluations (cache hits excluded)"""
+
+    def __init__(self, max_evaluations):
+        """
+        Args:
+            max_evaluations (int): evaluation budget of the run
+        """
+        self.max_evaluations = max_evaluations
+        self._start = 0
+
+    def start(self, solver):
+        self._start = solver.get_nb_evaluations()
+
+    def check(self, solver):
+        evaluations = solver.get_nb_evaluations() - self._start
+        if evaluations >= self.max_evaluations:
+            return f"evaluation budget: {evaluations} evaluations >= {self.max_evaluations}"
+        return None
+
+
+class AnyOf(TerminationCriterion):
+    """Stop as soon as one of the criteria is met (all of them are checked, so that their state stays up to date)"""
+
+    def __init__(self, *criteria):
+        self.criteria = criteria
+
+    def start(self, solver):
+        for criterion in self.criteria:
+            criterion.start(solver)
+
+    def check(self, solver):
+        reasons = [criterion.check(solver) for criterion in self.criteria]
+        return next((reason for reason in reasons if reason is not None), None)
+
+
+class AllOf(AnyOf):
+    """Stop when all the criteria are met at the same generation"""
+
+    def check(self, solver):
+        reasons = [criterion.check(solver) for criterion in self.criteria]
+        if all(reason is not None for reason in reasons):
+            return ' and '.join(reasons)
+        return None
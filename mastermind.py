@@ -11,8 +11,8 @@ a match of the game having a certain secret code generated at random.
 This class plays the role of the codemaker, allowing to check if a guess
 is correct and rating how close a guess is to the secret code.
 """
-from random import choice
 from typing import List
+import numpy as np
 
 # Possible colors for codes in in the game
 _colors = ['blue', 'red', 'green', 'yellow', 'orange', 'violet']
@@ -24,9 +24,16 @@ def get_possible_colors():
     return _colors
 
 
-def generate_random_secret(size) -> List[str]:
-    """Generate a random secret of a given size"""
-    secret = [choice(_colors) for _ in range(size)]
+def generate_random_secret(size, rng=None) -> List[str]:
+    """Generate a random secret of a given size
+
+    Args:
+        size (int): number of colors of the secret
+        rng (numpy.random.Generator, optional): random generator to draw
+        from. Defaults to None (a new unseeded one).
+    """
+    rng = np.random.default_rng(rng)
+    secret = [_colors[i] for i in rng.integers(0, len(_colors), size)]
     return secret
 
 
@@ -40,7 +47,8 @@ class MastermindMatch:
     def __init__(self,
                  secret_size=4,
                  correct_color_points=1,
-                 correct_position_points=3):
+                 correct_position_points=3,
+                 seed=None):
         """Instantiates a mastermind guess with a random secret code
 
         A match can be created by calling:
@@ -53,8 +61,13 @@ class MastermindMatch:
             color at the wrong position. Defaults to 1.
             correct_position_points (int, optional): points awarded for a
             correct color at the right position. Defaults to 3.
+            seed (int, numpy.random.SeedSequence or numpy.random.Generator,
+            optional): seed of the secret code and of the random guesses.
+            Defaults to None (not reproducible).
         """
-        self._secret = generate_random_secret(secret_size)
+        self._rng = np.random.default_rng(seed)
+        self._secret = generate_random_secret(secret_size, self._rng)
+        self._encoded_secret = np.array(encode_guess(self._secret))
         self.correct_color_points = correct_color_points
         self.correct_position_points = correct_position_points
 
@@ -70,7 +83,7 @@ class MastermindMatch:
         return guess == self._secret
 
     def generate_random_guess(self):
-        return generate_random_secret(len(self._secret))
+        return generate_random_secret(len(self._secret), self._rng)
 
     def rate_guess(self, guess: List[str]):
         """Gives a numeric score for a given guess proportional to how close
@@ -93,6 +106,43 @@ class MastermindMatch:
             correct_position * self.correct_position_points
         return score
 
+    def rate_guesses(self, guesses, multiplicity=False, return_counts=False):
+        """Scores a whole batch of encoded guesses at once, with array
+        operations instead of one call to rate_guess per guess
+
+        Args:
+            guesses (array): 2-D integer array, one guess per row encoded
+            like encode_guess (color indices)
+            multiplicity (bool, optional): standard Mastermind rules, each
+            color of the secret matches at most one color of the guess.
+            Defaults to False (same rules as rate_guess: a color at the wrong
+            position counts each time it appears anywhere in the secret).
+            return_counts (bool, optional): return the numbers of correct
+            positions and of correct colors at a wrong position instead of
+            the scores. Defaults to False.
+
+        Returns:
+            ndarray or tuple: the score of each guess, or the two arrays
+            (correct_position, correct_colors) with return_counts
+        """
+        guesses = np.asarray(guesses)
+        nb_colors = len(_colors)
+        exact = guesses == self._encoded_secret
+        correct_position = exact.sum(axis=1)
+        if multiplicity:
+            rows = np.arange(len(guesses))[:, None]
+            guess_counts = np.bincount((guesses + nb_colors*rows).ravel(), minlength=nb_colors*len(guesses)).reshape(len(guesses), nb_colors)
+            secret_counts = np.bincount(self._encoded_secret, minlength=nb_colors)
+            correct_colors = np.minimum(guess_counts, secret_counts).sum(axis=1) - correct_position
+        else:
+            present = np.zeros(nb_colors, dtype=bool)
+            present[self._encoded_secret] = True
+            correct_colors = (~exact & present[guesses]).sum(axis=1)
+        if return_counts:
+            return correct_position, correct_colors
+        return correct_colors*self.correct_color_points + \
+            correct_position*self.correct_position_points
+
     def secret_size(self):
         """Returns the size of the secret code"""
         return len(self._secret)
@@ -12,7 +12,8 @@ The file to specify all elements of the resolution of the mastermind game, that
 """
 from ga_solver import GAProblem
 import mastermind as mm
-import random
+from array import array
+import numpy as np
 
 class MastermindProblem(GAProblem):
     """Implementation of GAProblem for the mastermind problem - exemple of application of the Generic genetic algorithm module"""
@@ -26,8 +27,8 @@ class MastermindProblem(GAProblem):
         self.valid_colors = mm.get_possible_colors() #Get the colors used in the game
 
     def problem_chromosome(self):
-        """Definition of the "chromosome" for the Mastermind problem"""
-        return self.MATCH.generate_random_guess() #Generate a random guess of the problem's solution to create a chromosome
+        """Definition of the "chromosome" for the Mastermind problem: a compact array of color indices (see mastermind.encode_guess)"""
+        return array('B', self.rng.integers(0, len(self.valid_colors), self.MATCH.secret_size()).tolist()) #Generate a random guess of the problem's solution to create a chromosome
     
     def problem_fitness(self, chromosome):
         """Definition of the fitness for the Mastermind problem
@@ -35,7 +36,7 @@ class MastermindProblem(GAProblem):
         Args:
             chromosome (array): The chromosome whose fitness is to be calculated
         """
-        return self.MATCH.rate_guess(chromosome) #Calculate the fitness of the problem's chromosome
+        return self.MATCH.rate_guess(self.decode_chromosome(chromosome)) #Calculate the fitness of the problem's chromosome (the match works with color names)
 
     def reproduction(self, a, b):
         """
@@ -46,7 +47,7 @@ class MastermindProblem(GAProblem):
             a (array): A random chromosom from the population that will become one of the parent of the new chromosome
             b (array): A random chromosom from the population that will become the other parent of the new chromosome
         """
-        x_point = random.randrange(1, len(a.chromosome)-1) #Get a number in the length of the chromosome (Neither first or last to actually get a mix of parents).
+        x_point = int(self.rng.integers(1, len(a.chromosome)-1)) #Get a number in the length of the chromosome (Neither first or last to actually get a mix of parents).
         new_chrom = a.chromosome[0:x_point] + b.chromosome[x_point:] #Use the number to mix the parents
         return new_chrom
 
@@ -58,11 +59,63 @@ class MastermindProblem(GAProblem):
             new_chrom (array): the newborn chromosome
             len_chromosome (int): the length of a chromosome
         """
-        new_gene = random.choice(self.valid_colors) #Get a random color "nes_gene" in the range of the game's colors
-        pos = random.randrange(0, len_chromosome) #Get a number "pos" in the length of our chromosome
-        new_chrom = new_chrom[0:pos] + [new_gene] + new_chrom[pos+1:] #Replace the color in the chromosome with "new_gene" at the position corresponding to the number "pos"
+        new_gene = int(self.rng.integers(len(self.valid_colors))) #Get a random color "new_gene" in the range of the game's colors
+        pos = int(self.rng.integers(len_chromosome)) #Get a number "pos" in the length of our chromosome
+        new_chrom = array('B', new_chrom) #Copy the chromosome
+        new_chrom[pos] = new_gene #Replace the color in the chromosome with "new_gene" at the position corresponding to the number "pos"
         return new_chrom
 
+    # Batch hooks for the vectorized mode of GASolver: a chromosome is a row of color indices (see mastermind.encode_guess)
+
+    def batch_chromosomes(self, pop_size, rng):
+        """Create pop_size random guesses at once
+
+        Args:
+            pop_size (int): number of chromosomes to create
+            rng (numpy.random.Generator): random generator to draw from
+        """
+        return rng.integers(0, len(self.valid_colors), (pop_size, self.MATCH.secret_size()), dtype=np.uint8)
+
+    def batch_fitness(self, chromosomes):
+        """Fitness of many guesses at once, scored by the match in one call (see MastermindMatch.rate_guesses)
+
+        Args:
+            chromosomes (ndarray): 2-D integer array, one encoded guess per row
+        """
+        return self.MATCH.rate_guesses(chromosomes).astype(float)
+
+    def batch_reproduction(self, a, b, rng):
+        """Same crossover as reproduction for every pair of parents at once, with a random cut point for each child
+
+        Args:
+            a (ndarray): 2-D integer array, the first parent of each child
+            b (ndarray): 2-D integer array, the second parent of each child
+            rng (numpy.random.Generator): random generator to draw from
+        """
+        x_point = rng.integers(1, a.shape[1]-1, len(a)) #Cut point of each child, neither first or last
+        from_a = np.arange(a.shape[1]) < x_point[:, None]
+        return np.where(from_a, a, b)
+
+    def batch_mutation(self, chromosomes, rng):
+        """Replace a random gene by a random color in every given guess at once
+
+        Args:
+            chromosomes (ndarray): 2-D integer array of guesses to mutate
+            rng (numpy.random.Generator): random generator to draw from
+        """
+        rows = np.arange(len(chromosomes))
+        pos = rng.integers(0, chromosomes.shape[1], len(chromosomes))
+        chromosomes[rows, pos] = rng.integers(0, len(self.valid_colors), len(chromosomes))
+        return chromosomes
+
+    def decode_chromosome(self, chromosome):
+        """Translate a compact chromosome or a row of color indices back to the list of color names"""
+        return [self.valid_colors[i] for i in chromosome]
+
+    def chromosome_from_row(self, row):
+        """Translate a row of color indices to a compact chromosome"""
+        return array('B', row.tolist())
+
 
 
 if __name__ == '__main__':
@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+"""
+Exact Mastermind solver by consistent-guess filtering
+
+Instead of the blind GA search of mastermind_problem.py, the whole code space (6^secret_size codes) is enumerated
+as an integer-encoded array (same encoding as mastermind.encode_guess). After each guess rated by the match,
+only the codes that would have given the same score are kept, and the next guess is the consistent code that splits
+the remaining candidates best (minimax or entropy heuristic). The feedback of a guess against all candidates is computed
+with whole-array operations, so the expensive oracle (MastermindMatch.rate_guess) is called only once per guess.
+When the code space is too large to enumerate, the solver falls back to the genetic algorithm.
+"""
+import numpy as np
+import mastermind as mm
+from ga_solver import GASolver
+from mastermind_problem import MastermindProblem
+
+STRATEGIES = ('entropy', 'minimax')
+
+
+def all_codes(secret_size, nb_colors):
+    """Enumerate every code of the given size as a 2-D array of color indices, one code per row"""
+    powers = nb_colors ** np.arange(secret_size - 1, -1, -1)
+    return ((np.arange(nb_colors**secret_size)[:, None] // powers) % nb_colors).astype(np.int8)
+
+
+def code_scores(guesses, secrets, match):
+    """Scores that each guess would get against each candidate secret, with the point schedule of the match
+    (same rules as MastermindMatch.rate_guess: a color at the wrong position counts if it appears anywhere in the secret)
+
+    Args:
+        guesses (ndarray): 2-D array of encoded guesses, shape (nb_guesses, secret_size)
+        secrets (ndarray): 2-D array of encoded candidate secrets, shape (nb_secrets, secret_size)
+        match (MastermindMatch): the match giving the point schedule
+
+    Returns:
+        ndarray: 2-D integer array of shape (nb_guesses, nb_secrets)
+    """
+    nb_colors = len(mm.get_possible_colors())
+    present = np.zeros((len(secrets), nb_colors), dtype=bool) #Colors present anywhere in each secret
+    present[np.arange(len(secrets))[:, None], secrets] = True
+    exact = guesses[:, None, :] == secrets[None, :, :]
+    color_only = ~exact & present[:, guesses].transpose(1, 0, 2)
+    return exact.sum(axis=2) * match.correct_position_points + color_only.sum(axis=2) * match.correct_color_points
+
+
+class MastermindSolver:
+    """Codebreaker playing against a MastermindMatch by pruning the set of codes consistent with the scores received"""
+
+    def __init__(self, match, strategy='entropy', max_candidates=6**8, guess_sample=100, candidate_sample=2000, seed=None):
+        """Initialize the solver for a match
+
+        Args:
+            match (MastermindMatch): the match to solve, its rate_guess method is the oracle
+            strategy (str, optional): 'entropy' (guess maximizing the information of its score) or
+                'minimax' (guess minimizing the largest set of remaining candidates). Defaults to 'entropy'.
+            max_candidates (int, optional): largest code space enumerated, beyond it the GA is used. Defaults to 6**8.
+            guess_sample (int, optional): number of consistent codes considered as next guess. Defaults to 100.
+            candidate_sample (int, optional): number of candidates used to rate a possible guess. Defaults to 2000.
+            seed (int, optional): seed of the samplings. Defaults to None.
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError(f"strategy must be one of {STRATEGIES}, not {strategy!r}")
+        self.match = match
+        self.strategy = strategy
+        self.max_candidates = max_candidates
+        self.guess_sample = guess_sample
+        self.candidate_sample = candidate_sample
+        self._rng = np.random.default_rng(seed)
+        self.colors = mm.get_possible_colors()
+        self.nb_oracle_calls = 0 #Number of calls to match.rate_guess
+        self.candidates_history = [] #Number of consistent candidates before each guess
+
+    def can_enumerate(self):
+        """Check if the code space is small enough to be enumerated"""
+        return len(self.colors) ** self.match.secret_size() <= self.max_candidates
+
+    def _sample(self, candidates, size):
+        """At most size candidates taken at random"""
+        if len(candidates) <= size:
+            return candidates
+        return candidates[self._rng.choice(len(candidates), size, replace=False)]
+
+    def choose_guess(self, candidates):
+        """Pick the next guess among the consistent candidates with the minimax or entropy heuristic"""
+        if len(candidates) <= 2:
+            return candidates[0]
+        guesses = self._sample(candidates, self.guess_sample)
+        secrets = self._sample(candidates, self.candidate_sample)
+        scores = code_scores(guesses, secrets, self.match)
+        nb_scores = max(self.match.correct_color_points, self.match.correct_position_points) * self.match.secret_size() + 1 #Above max_score if a color is worth more than a position
+        partitions = np.bincount((scores + nb_scores * np.arange(len(guesses))[:, None]).ravel(),
+                                 minlength=nb_scores * len(guesses)).reshape(len(guesses), nb_scores) #Number of candidates per possible score
+        if self.strategy == 'minimax':
+            return guesses[np.argmin(partitions.max(axis=1))]
+        probabilities = partitions / len(secrets)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            entropy = -np.nansum(probabilities * np.log2(probabilities), axis=1)
+        return guesses[np.argmax(entropy)]
+
+    def rate(self, guess):
+        """Ask the oracle to rate an encoded guess"""
+        self.nb_oracle_calls += 1
+        return self.match.rate_guess([self.colors[i] for i in guess])
+
+    def solve(self):
+        """Play until the secret is found
+
+        Returns:
+            list[str]: the secret code as a list of color strings
+        """
+        if not self.can_enumerate():
+            return self._solve_with_ga()
+        candidates = all_codes(self.match.secret_size(), len(self.colors))
+        while True:
+            self.candidates_history.append(len(candidates))
+            guess = self.choose_guess(candidates)
+            score = self.rate(guess)
+            if self.match.is_correct([self.colors[i] for i in guess]): #Not score == max_score: when a color at the wrong position is worth as much as a correct position, other codes get it too
+                return [self.colors[i] for i in guess]
+            consistent = code_scores(guess[None, :], candidates, self.match)[0] == score
+            candidates = candidates[consistent & (candidates != guess).any(axis=1)] #Keep the codes consistent with the score, except the wrong guess
+
+    def _solve_with_ga(self):
+        """Fallback for code spaces too large to enumerate: the genetic algorithm, with a cache to avoid rating a guess twice"""
+        solver = GASolver(MastermindProblem(self.match), seed=self._rng.integers(2**32), cache_size=100000)
+        solver.reset_population()
+        solver.evolve_until(max_nb_of_generations=10000, threshold_fitness=self.match.max_score())
+        self.nb_oracle_calls += solver.get_nb_evaluations()
+        return solver.get_best_individual().chromosome
+
+
+if __name__ == '__main__':
+
+    match = mm.MastermindMatch(secret_size=6)
+    solver = MastermindSolver(match)
+    guess = solver.solve()
+    print(f"Best guess {guess}")
+    print(f"Problem solved? {match.is_correct(guess)}")
+    print(f"Calls to rate_guess: {solver.nb_oracle_calls}, candidates before each guess: {solver.candidates_history}")
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Batch runner for parameter sweeps of ga_solver
+
+Runs GASolver on every combination of a grid of problems (TSP cities files, Mastermind secret sizes),
+solver parameters (population size, selection rate, mutation rate) and seeds, in parallel in --workers processes.
+Each run has its own process, so that a run killed by the system (or crashing the interpreter) is reported
+as an error without stopping the others, and is limited in time (TimeBudget) and optionally in memory
+(address space limit of its process, on Unix).
+The result of each run is written to the output file as soon as it finishes: one JSON object per line (.jsonl)
+or one CSV row (.csv), so that a long sweep can be followed and its partial results kept if it is interrupted.
+
+Usage:
+    python sweep.py --tsp cities.txt --pop-sizes 50 100 200 --mutation-rates 0.05 0.1 0.2 --seeds 0 1 2 --output sweep.jsonl
+    python sweep.py --mastermind-sizes 6 8 10 --selection-rates 0.3 0.5 --seeds 0 1 2 3 --workers 4 --max-memory 500 --output sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+import multiprocessing
+import multiprocessing.connection
+import cities
+import mastermind as mm
+from ga_solver import GASolver
+from ga_termination import Stagnation, TimeBudget
+from mastermind_problem import MastermindProblem
+from tsp_problem import CROSSOVERS, TSProblem
+
+try:
+    import resource #Unix only: the memory limit is ignored elsewhere
+except ImportError:
+    resource = None
+
+RESULT_FIELDS = ('problem', 'instance', 'pop_size', 'selection_rate', 'mutation_rate', 'seed',
+                 'generations', 'evaluations', 'seconds', 'best_fitness', 'solved', 'stop_reason', 'error')
+
+
+def make_jobs(tsp_files, mastermind_sizes, pop_sizes, selection_rates, mutation_rates, seeds):
+    """List the runs of the grid, as dicts of parameters (problems first, seeds last)"""
+    problems = [('tsp', filename) for filename in tsp_files] + [('mastermind', size) for size in mastermind_sizes]
+    return [{'problem': kind, 'instance': instance, 'pop_size': pop_size, 'selection_rate': selection_rate,
+             'mutation_rate': mutation_rate, 'seed': seed}
+            for (kind, instance), pop_size, selection_rate, mutation_rate, seed
+            in itertools.product(problems, pop_sizes, selection_rates, mutation_rates, seeds)]
+
+
+def _limit_resources(max_memory_mb):
+    """Limit the address space of a worker process, so that a run using too much memory
+    fails with a MemoryError instead of bringing the machine down"""
+    if max_memory_mb is not None and resource is not None:
+        limit = int(max_memory_mb * 2**20)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def run_job(job, max_generations, max_seconds, stagnation=None, tsp_options=None):
+    """Run one job of the sweep (in a worker process) and return its result as a dict with the keys of RESULT_FIELDS.
+    Errors of the run are reported in the 'error' field instead of being raised, so that the sweep goes on"""
+    result = dict(job, generations=None, evaluations=None, seconds=None, best_fitness=None, solved=None, stop_reason=None, error=None)
+    start = time.perf_counter()
+    try:
+        if job['problem'] == 'tsp':
+            problem = TSProblem(cities.load_city_arrays(job['instance']), **(tsp_options or {}))
+            threshold = None
+        else:
+            match = mm.MastermindMatch(secret_size=job['instance'], seed=job['seed'])
+            problem = MastermindProblem(match)
+            threshold = match.max_score()
+        solver = GASolver(problem, selection_rate=job['selection_rate'], mutation_rate=job['mutation_rate'], seed=job['seed'])
+        termination = [TimeBudget(max_seconds)] + ([Stagnation(stagnation)] if stagnation else [])
+        solver.reset_population(job['pop_size'])
+        result['stop_reason'] = solver.evolve_until(max_generations, threshold_fitness=threshold, termination=termination)
+        result.update(generations=solver.get_generation(), evaluations=solver.get_nb_evaluations(), best_fitness=solver.get_best_fitness())
+        if threshold is not None:
+            result['solved'] = result['best_fitness'] >= threshold
+    except Exception as error: #MemoryError included
+        result['error'] = f"{type(error).__name__}: {error}"
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def _run_in_process(connection, max_memory_mb, job, *options):
+    """Target of the worker processes: run one job and send its result to the main process"""
+    _limit_resources(max_memory_mb)
+    connection.send(run_job(job, *options))
+    connection.close()
+
+
+class ResultWriter:
+    """Append the results to a JSONL file, or to a CSV file if its name ends with .csv, flushing each of them"""
+
+    def __init__(self, filename):
+        self._file = open(filename, 'w', newline='')
+        self._writer = None
+        if filename.endswith('.csv'):
+            self._writer = csv.DictWriter(self._file, RESULT_FIELDS)
+            self._writer.writeheader()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._file.close()
+
+    def write(self, result):
+        if self._writer is not None:
+            self._writer.writerow(result)
+        else:
+            self._file.write(json.dumps(result) + '\n')
+        self._file.flush()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a grid of GASolver runs in parallel and stream their results")
+    parser.add_argument('--tsp', nargs='*', default=[], metavar='FILE', help="cities files (cities.txt format) of the TSP problems")
+    parser.add_argument('--mastermind-sizes', type=int, nargs='*', default=[], help="secret sizes of the Mastermind problems (the secret depends on the seed)")
+    parser.add_argument('--pop-sizes', type=int, nargs='+', default=[50])
+    parser.add_argument('--selection-rates', type=float, nargs='+', default=[0.5])
+    parser.add_argument('--mutation-rates', type=float, nargs='+', default=[0.1])
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0])
+    parser.add_argument('--generations', type=int, default=1000, help="maximum number of generations of each run")
+    parser.add_argument('--max-seconds', type=float, default=60.0, help="time budget of each run")
+    parser.add_argument('--stagnation', type=int, help="stop a run after this number of generations without improvement")
+    parser.add_argument('--crossover', choices=CROSSOVERS, default='midpoint', help="crossover of the TSP problems")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="number of runs in parallel")
+    parser.add_argument('--max-memory', type=float, help="address space limit of each worker process, in MiB (Unix only)")
+    parser.add_argument('--output', default='sweep_results.jsonl', help="results file, JSONL or CSV (.csv)")
+    args = parser.parse_args(argv)
+
+    jobs = make_jobs(args.tsp, args.mastermind_sizes, args.pop_sizes, args.selection_rates, args.mutation_rates, args.seeds)
+    if not jobs:
+        parser.error("no problem given: use --tsp and/or --mastermind-sizes")
+    tsp_options = {'crossover': args.crossover}
+    nb_errors = 0
+    pending = deque(jobs)
+    running = {} #Connection receiving the result of each running job -> (process, job)
+    done = 0
+    with ResultWriter(args.output) as writer:
+        while pending or running:
+            while pending and len(running) < args.workers:
+                job = pending.popleft()
+                receiver, sender = multiprocessing.Pipe(duplex=False)
+                process = multiprocessing.Process(target=_run_in_process, daemon=True,
+                                                  args=(sender, args.max_memory, job, args.generations, args.max_seconds, args.stagnation, tsp_options))
+                process.start()
+                sender.close() #Only the worker holds it now: the receiver gets EOFError if the worker dies without a result
+                running[receiver] = (process, job)
+            for receiver in multiprocessing.connection.wait(list(running)):
+                process, job = running.pop(receiver)
+                try:
+                    result = receiver.recv()
+                except EOFError: #The worker process died (e.g. killed by the system): the job has no result
+                    result = None
+                receiver.close()
+                process.join()
+                if result is None:
+                    result = dict(job, error=f"worker process died with exit code {process.exitcode}")
+                done += 1
+                nb_errors += result.get('error') is not None
+                writer.write(result)
+                print(f"[{done}/{len(jobs)}] {result['problem']} {result['instance']} pop {result['pop_size']} selection {result['selection_rate']} "
+                      f"mutation {result['mutation_rate']} seed {result['seed']}: "
+                      + (f"error {result['error']}" if result.get('error') else f"best {result['best_fitness']:.1f} after {result['generations']} generations ({result['stop_reason']})"))
+    print(f"{len(jobs)} runs written to {args.output}, {nb_errors} errors")
+    return 1 if nb_errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
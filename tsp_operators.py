@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+Operators for the TSP problem
+
+- O(n) order-preserving crossovers (OX, PMX and a simplified edge assembly crossover) using position arrays and
+  bitmaps instead of "not in list" scans
+- Local search (2-opt and Or-opt) restricted to the nearest neighbours of each city, with don't-look bits,
+  used by TSProblem to improve offspring (memetic algorithm)
+
+Tours are sequences of city indices (compact chromosomes of TSProblem); the functions return new lists.
+"""
+from collections import deque
+from math import hypot
+
+IMPROVEMENT_EPSILON = 1e-9 #Smallest gain accepted by the local search (avoids looping on rounding errors)
+
+
+def order_crossover(a, b, start, end):
+    """OX: the child keeps a[start:end] in place, the other positions are filled from end onwards with the cities
+    of b in their order in b (starting after end), skipping the ones already taken
+
+    Args:
+        a (sequence): first parent tour
+        b (sequence): second parent tour
+        start (int): first position of the section copied from a
+        end (int): position after the section copied from a
+    """
+    nb_cities = len(a)
+    child = [0]*nb_cities
+    taken = bytearray(nb_cities)
+    for k in range(start, end):
+        child[k] = a[k]
+        taken[a[k]] = 1
+    position = end % nb_cities
+    for k in range(nb_cities):
+        city = b[(end + k) % nb_cities]
+        if not taken[city]:
+            child[position] = city
+            position = (position + 1) % nb_cities
+    return child
+
+
+def partially_mapped_crossover(a, b, start, end):
+    """PMX: the child keeps a[start:end] in place, the other positions come from b, following the mapping
+    a[k] -> b[k] of the section when the city of b is already taken
+
+    Args:
+        a (sequence): first parent tour
+        b (sequence): second parent tour
+        start (int): first position of the section copied from a
+        end (int): position after the section copied from a
+    """
+    nb_cities = len(a)
+    position_in_a = [0]*nb_cities
+    for k, city in enumerate(a):
+        position_in_a[city] = k
+    taken = bytearray(nb_cities)
+    for k in range(start, end):
+        taken[a[k]] = 1
+    child = list(b)
+    child[start:end] = a[start:end]
+    for k in list(range(0, start)) + list(range(end, nb_cities)):
+        city = b[k]
+        while taken[city]: #Follow the mapping until the city is not in the section
+            city = b[position_in_a[city]]
+        child[k] = city
+    return child
+
+
+def edge_assembly_crossover(a, b, neighbour_lists, distance, start_city):
+    """Simplified edge assembly crossover (EAX-lite): build the child greedily from the edges of both parents,
+    going each time to the closest unvisited city linked to the current one in a or b, then to the closest unvisited
+    nearest neighbour, then to the next unvisited city of a
+
+    Args:
+        a (sequence): first parent tour
+        b (sequence): second parent tour
+        neighbour_lists (list[list[int]]): nearest neighbours of each city, closest first
+        distance (callable): distance(i, j) between two cities
+        start_city (int): first city of the child
+    """
+    nb_cities = len(a)
+    linked = [[] for _ in range(nb_cities)] #Neighbours of each city in the two parents
+    for parent in (a, b):
+        for k in range(nb_cities):
+            city, following = parent[k], parent[(k + 1) % nb_cities]
+            linked[city].append(following)
+            linked[following].append(city)
+    visited = bytearray(nb_cities)
+    child = []
+    city = start_city
+    fallback = 0 #Position in a of the next candidate for the last resort
+    for _ in range(nb_cities):
+        visited[city] = 1
+        child.append(city)
+        candidates = [c for c in linked[city] if not visited[c]] or [c for c in neighbour_lists[city] if not visited[c]]
+        if candidates:
+            city = min(candidates, key=lambda c: distance(city, c))
+        else:
+            while fallback < nb_cities and visited[a[fallback]]:
+                fallback += 1
+            if fallback == nb_cities:
+                break
+            city = a[fallback]
+    return child
+
+
+class LocalSearch:
+    """2-opt and Or-opt improvement of tours, restricted to the nearest neighbours of each city,
+    with don't-look bits: only the cities whose edges changed are checked again"""
+
+    def __init__(self, coords, neighbour_lists, moves=('2-opt', 'or-opt')):
+        """
+        Args:
+            coords (array): (n, 2) coordinates of the cities
+            neighbour_lists (list[list[int]]): nearest neighbours of each city, closest first
+            moves (tuple, optional): moves used, in this order. Defaults to ('2-opt', 'or-opt').
+        """
+        self.xs = [float(x) for x in coords[:, 0]]
+        self.ys = [float(y) for y in coords[:, 1]]
+        self.neighbour_lists = neighbour_lists
+        self.moves = moves
+
+    def distance(self, i, j):
+        """Distance between the cities of index i and j"""
+        return hypot(self.xs[i] - self.xs[j], self.ys[i] - self.ys[j])
+
+    def improve(self, tour):
+        """Apply the moves until no improving move is found
+
+        Args:
+            tour (sequence): tour of city indices
+
+        Returns:
+            list: the improved tour
+        """
+        tour = list(tour)
+        if len(tour) < 5:
+            return tour
+        while True:
+            if '2-opt' in self.moves:
+                self.two_opt(tour)
+            if 'or-opt' not in self.moves or not self.or_opt(tour) or '2-opt' not in self.moves:
+                return tour #Otherwise the Or-opt moves may have opened new 2-opt moves
+
+    @staticmethod
+    def _positions(tour):
+        positions = [0]*len(tour)
+        for k, city in enumerate(tour):
+            positions[city] = k
+        return positions
+
+    @staticmethod
+    def _reverse(tour, positions, start, end):
+        """Reverse the cyclic section of the tour from position start to position end (included), or the complement
+        when it is shorter (same tour in the other direction)"""
+        nb_cities = len(tour)
+        length = (end - start) % nb_cities + 1
+        if 2*length > nb_cities:
+            start, end = (end + 1) % nb_cities, (start - 1) % nb_cities
+            length = nb_cities - length
+        for _ in range(length // 2):
+            tour[start], tour[end] = tour[end], tour[start]
+            positions[tour[start]], positions[tour[end]] = start, end
+            start, end = (start + 1) % nb_cities, (end - 1) % nb_cities
+
+    def two_opt(self, tour):
+        """2-opt in place: replace two edges (a, b) and (c, d) by (a, c) and (b, d) when it is shorter,
+        with c among the nearest neighbours of a
+
+        Returns:
+            bool: True if the tour was improved
+        """
+        nb_cities = len(tour)
+        distance = self.distance
+        positions = self._positions(tour)
+        active = deque(tour) #Cities to check (don't-look bit off)
+        in_queue = bytearray(b'\x01'*nb_cities)
+        improved = False
+        while active:
+            a = active.popleft()
+            in_queue[a] = 0
+            for step in (1, -1): #Edge to the next city, then to the previous one
+                i = positions[a]
+                b = tour[(i + step) % nb_cities]
+                d_ab = distance(a, b)
+                move = None
+                for c in self.neighbour_lists[a]:
+                    d_ac = distance(a, c)
+                    if d_ac >= d_ab: #Neighbours are sorted: no closer city left to gain anything
+                        break
+                    j = positions[c]
+                    d = tour[(j + step) % nb_cities]
+                    if c == b or d == a:
+                        continue
+                    if d_ac + distance(b, d) - d_ab - distance(c, d) < -IMPROVEMENT_EPSILON:
+                        move = (c, d, j)
+                        break
+                if move is not None:
+                    c, d, j = move
+                    if step == 1:
+                        self._reverse(tour, positions, (i + 1) % nb_cities, j) #b...c becomes c...b
+                    else:
+                        self._reverse(tour, positions, j, (i - 1) % nb_cities) #c...b becomes b...c... on the other side
+                    for city in (a, b, c, d):
+                        if not in_queue[city]:
+                            in_queue[city] = 1
+                            active.append(city)
+                    improved = True
+                    break
+        return improved
+
+    def or_opt(self, tour, max_length=3):
+        """Or-opt in place: move a section of 1 to max_length cities (possibly reversed) between two other
+        consecutive cities c and e, when it is shorter, c being a nearest neighbour of one end of the section
+
+        Returns:
+            bool: True if the tour was improved
+        """
+        nb_cities = len(tour)
+        positions = self._positions(tour)
+        active = deque(tour)
+        in_queue = bytearray(b'\x01'*nb_cities)
+        improved = False
+        while active:
+            first = active.popleft()
+            in_queue[first] = 0
+            move = self._find_or_move(tour, positions, first, max_length)
+            if move is None:
+                continue
+            section, end, c, e = move
+            i = positions[first]
+            touched = [tour[(i - 1) % nb_cities], tour[(i + len(section)) % nb_cities], section[0], section[-1], c, e]
+            self._move_section(tour, positions, section, end, c, e)
+            for city in touched:
+                if not in_queue[city]:
+                    in_queue[city] = 1
+                    active.append(city)
+            improved = True
+        return improved
+
+    def _two_opt_move(self, tour, positions, a, b, c):
+        """Replace the edges (a, b) and (c, d) by (a, c) and (b, d), d being the city after c when going from a to b,
+        by reversing the path from b to c (or the rest of the tour, which gives the same loop)"""
+        nb_cities = len(tour)
+        if tour[(positions[a] + 1) % nb_cities] == b:
+            self._reverse(tour, positions, positions[b], positions[c])
+        else: #The tour goes from b to a: same move read backwards
+            self._reverse(tour, positions, positions[c], positions[b])
+
+    def _move_section(self, tour, positions, section, end, c, e):
+        """Move the section between the consecutive cities c and e, its end "end" next to c, with two or three
+        2-opt moves (reversals keeping the positions up to date) instead of rebuilding the tour"""
+        nb_cities = len(tour)
+        i = positions[section[0]]
+        first, last = section[0], section[-1]
+        before, after = tour[(i - 1) % nb_cities], tour[(i + len(section)) % nb_cities]
+        x, y = (c, e) if tour[(positions[c] + 1) % nb_cities] == e else (e, c) #y follows x in the direction before -> section -> after
+        if y == before: #Insertion just before the section: same as just after it, going the other way around
+            before, after, first, last, x, y = after, before, last, first, before, x
+        self._two_opt_move(tour, positions, before, first, x) #before, x ... after, last ... first, y
+        if x != after:
+            self._two_opt_move(tour, positions, before, x, after) #before, after ... x, last ... first, y
+        if (last if c == x else first) != end: #Wrong way round: reverse the section between x and y
+            self._two_opt_move(tour, positions, x, last, first)
+
+    def _find_or_move(self, tour, positions, first, max_length):
+        """First improving Or-opt move of a section starting at the city "first"
+
+        Returns:
+            tuple: (section, end, c, e) - the section moves between the consecutive cities c and e, its end "end" next to c;
+            None if no move improves the tour
+        """
+        nb_cities = len(tour)
+        distance = self.distance
+        i = positions[first]
+        for length in range(1, min(max_length, nb_cities - 3) + 1):
+            section = [tour[(i + k) % nb_cities] for k in range(length)]
+            before, after = tour[(i - 1) % nb_cities], tour[(i + length) % nb_cities]
+            gain = distance(before, section[0]) + distance(section[-1], after) - distance(before, after) #Saved by removing the section
+            if gain <= IMPROVEMENT_EPSILON:
+                continue
+            in_section = set(section)
+            for end, other in ((section[0], section[-1]), (section[-1], section[0])):
+                for c in self.neighbour_lists[end]:
+                    if distance(end, c) >= gain: #Neighbours are sorted: the next ones can't gain anything either
+                        break
+                    if c in in_section:
+                        continue
+                    j = positions[c]
+                    for e in (tour[(j + 1) % nb_cities], tour[(j - 1) % nb_cities]):
+                        if e in in_section or {c, e} == {before, after}: #Putting the section back in place is not a move
+                            continue
+                        if distance(c, end) + distance(other, e) - distance(c, e) < gain - IMPROVEMENT_EPSILON:
+                            return section, end, c, e
+        return None
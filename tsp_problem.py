@@ -11,24 +11,207 @@ GA solving TSP example
 The file to specify all elements of the resolution of the TSP problem, that are not generic.
 """
 from ga_solver import GAProblem
+from ga_monitor import GenerationObserver
 import cities
-import random
+import tsp_operators
+from array import array
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+DENSE_DISTANCES_MAX_CITIES = 4000 #Above this number of cities, distances are computed from the coordinates instead of being stored (the matrix grows as n²)
+CROSSOVERS = ('midpoint', 'ox', 'pmx', 'eax') #Crossovers available for the reproduction (see tsp_operators)
+
+_frame_cities = None #Cities installed once in the process drawing the frames of TourFrameWriter
+
+
+def _init_frame_process(city_dict):
+    """Initializer of the process drawing the frames: keep the cities, so that they are not sent with each frame"""
+    global _frame_cities
+    _frame_cities = city_dict
+
+
+def _draw_frame(road, filename, title, labels):
+    """Draw one frame in the frame process"""
+    cities.save_road_image(_frame_cities, road, filename, title, labels)
 
 class TSProblem(GAProblem):
     """Implementation of GAProblem for the traveling salesperson problem - exemple of application of the Generic genetic algorithm module"""
-    def __init__(self, city_dict):
+    def __init__(self, city_dict, seeded_rate=0.0, neighbour_mutation=False, nb_neighbours=10,
+                 crossover='midpoint', local_search_rate=0.0, local_search_moves=('2-opt', 'or-opt')):
         """Initialize the Genetic algorithm problem to be solved by ga_solver, defining important variables specific to the TSP problem
         
         Args:
-            city_dict (Array[String]) = List of cities with their coordinates
+            city_dict (Array[String]) = List of cities with their coordinates (from cities.load_cities),
+                or tuple (names, coordinates) of arrays (from cities.load_city_arrays, faster for very big files)
+            seeded_rate (float, optional) = Part of the initial population made of nearest-neighbour tours instead of random tours. Defaults to 0.0.
+            neighbour_mutation (bool, optional) = Mutate by bringing a city next to one of its nearest neighbours (2-opt move)
+                instead of swapping two random cities. Defaults to False.
+            nb_neighbours (int, optional) = Number of nearest neighbours kept for each city. Defaults to 10.
+            crossover (str, optional) = 'midpoint' (first half of a, then the missing cities in b's order), 'ox' (order crossover),
+                'pmx' (partially mapped crossover) or 'eax' (greedy edge assembly from the edges of both parents). Defaults to 'midpoint'.
+            local_search_rate (float, optional) = Part of the children improved by a local search before their evaluation
+                (memetic algorithm, see tsp_operators.LocalSearch). Defaults to 0.0.
+            local_search_moves (tuple, optional) = Moves of the local search, '2-opt' and/or 'or-opt'. Defaults to ('2-opt', 'or-opt').
         """
-        self.possible_cities = cities.default_road(city_dict) #Get the possible cities for the problem
+        if crossover not in CROSSOVERS:
+            raise ValueError(f"crossover must be one of {CROSSOVERS}, not {crossover!r}")
+        if isinstance(city_dict, tuple):
+            names, coords = city_dict
+            self.city_dict = None
+            self.possible_cities = np.asarray(names).tolist() #Get the possible cities for the problem
+        else:
+            self.city_dict = city_dict
+            self.possible_cities = cities.default_road(city_dict) #Get the possible cities for the problem
+            coords = [city_dict[c] for c in self.possible_cities]
+        self.seeded_rate = seeded_rate
+        self.neighbour_mutation = neighbour_mutation
+        self.nb_neighbours = nb_neighbours
+        self.crossover = crossover
+        self.local_search_rate = local_search_rate
+        self.local_search_moves = tuple(local_search_moves)
+        self._local_search = None #tsp_operators.LocalSearch, built when first needed
+        self._city_index = None #Integer index of each city name, built when first needed
+        self._neighbours = None #Nearest neighbours of each city, built when first needed
+        self._grid = None #cities.CityGrid of the cities, built when first needed
+        self._neighbour_lists = None #Same as lists, faster to read one by one from Python code
+        self._dtype = np.uint16 if len(self.possible_cities) <= 2**16 else np.uint32 #Smallest integers able to hold a city index
+        self._typecode = 'H' if self._dtype == np.uint16 else 'I'
+        self._coords = np.array(coords, dtype=float) #Coordinates of each city, indexed like possible_cities
+        self._distances = self._distance_matrix() #Dense matrix of distances between city indices (None for very big instances)
+
+    @property
+    def city_index(self):
+        """Integer index of each city name"""
+        if self._city_index is None:
+            self._city_index = {city: i for i, city in enumerate(self.possible_cities)}
+        return self._city_index
+
+    @property
+    def neighbours(self):
+        """(n, nb_neighbours) array of the nearest cities of each city, closest first (found with the grid index of cities.CityGrid)"""
+        if self._neighbours is None:
+            self._neighbours = self.grid.nearest_neighbours(self.nb_neighbours)
+        return self._neighbours
+
+    @property
+    def grid(self):
+        """cities.CityGrid of the cities, spatial index used to find the nearest cities"""
+        if self._grid is None:
+            self._grid = cities.CityGrid(self._coords)
+        return self._grid
+
+    @property
+    def neighbour_lists(self):
+        """Same as neighbours, as a list of lists"""
+        if self._neighbour_lists is None:
+            self._neighbour_lists = self.neighbours.tolist()
+        return self._neighbour_lists
+
+    @property
+    def local_search(self):
+        """tsp_operators.LocalSearch of the instance, working on the neighbour lists"""
+        if self._local_search is None:
+            self._local_search = tsp_operators.LocalSearch(self._coords, self.neighbour_lists, self.local_search_moves)
+        return self._local_search
+
+    def nearest_neighbour_tour(self, start):
+        """Greedy tour going each time to the nearest city not visited yet, found in the neighbour lists
+        (or, when all the neighbours are already visited, the nearest unvisited city found in the grid of the cities)
+
+        Args:
+            start (int): index of the first city
+        """
+        neighbour_lists = self.neighbour_lists
+        grid = self.grid
+        nb_cities = len(self.possible_cities)
+        visited = bytearray(nb_cities)
+        remaining = np.ones(nb_cities, dtype=bool) #Unvisited cities for the grid search, updated at the dead ends only
+        counts = None #Unvisited cities in each cell of the grid, built at the first dead end
+        nb_removed = 0 #Cities of the tour already removed from remaining and counts
+        tour = array(self._typecode)
+        city = start
+        for _ in range(nb_cities - 1):
+            visited[city] = 1
+            tour.append(city)
+            for candidate in neighbour_lists[city]:
+                if not visited[candidate]:
+                    city = candidate
+                    break
+            else: #Dead end: all the neighbours are visited, search the grid around the city
+                if counts is None:
+                    counts = grid.remaining_counts().copy()
+                    cell_x, cell_y = grid.cells[:, 0].tolist(), grid.cells[:, 1].tolist()
+                for visited_city in tour[nb_removed:]:
+                    remaining[visited_city] = False
+                    counts[cell_x[visited_city], cell_y[visited_city]] -= 1
+                nb_removed = len(tour)
+                city = grid.nearest_remaining(city, remaining, counts)
+        tour.append(city)
+        return tour
+
+    def __getstate__(self):
+        """Pickle support (process pools): the distance matrix is rebuilt on the other side instead of being sent"""
+        state = self.__dict__.copy()
+        state['_distances'] = None
+        state['_city_index'] = None
+        state['_local_search'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._distances = self._distance_matrix()
+
+    def _distance_matrix(self):
+        """Build the dense matrix of euclidian distances between all cities once, block of rows by block of rows to limit temporary memory"""
+        nb_cities = len(self._coords)
+        if nb_cities > DENSE_DISTANCES_MAX_CITIES:
+            return None
+        distances = np.empty((nb_cities, nb_cities))
+        for start in range(0, nb_cities, 512):
+            block = self._coords[start:start+512]
+            distances[start:start+512] = np.hypot(block[:, None, 0] - self._coords[:, 0], block[:, None, 1] - self._coords[:, 1])
+        return distances
+
+    def distance(self, i, j):
+        """Distance between the cities of index i and j
+
+        Args:
+            i (int): index of the first city in possible_cities
+            j (int): index of the second city in possible_cities
+        """
+        if self._distances is not None:
+            return self._distances[i, j]
+        (x_i, y_i), (x_j, y_j) = self._coords[i], self._coords[j]
+        return ((x_i - x_j)**2 + (y_i - y_j)**2)**0.5
+
+    def tour_length(self, tour):
+        """Length of a closed tour given as city indices
+
+        Args:
+            tour (array): sequence of city indices
+        """
+        tour = np.asarray(tour)
+        following = np.roll(tour, -1) #Next city of each city in the tour (the last one goes back to the first)
+        if self._distances is not None:
+            return float(self._distances[tour, following].sum())
+        legs = self._coords[tour] - self._coords[following]
+        return float(np.hypot(legs[:, 0], legs[:, 1]).sum())
 
     def problem_chromosome(self):
-        """Definition of the "chromosome" for the TSP problem"""
-        chromosome = cities.default_road(city_dict) #Get the list of the cities
-        random.shuffle(chromosome) #Shuffle the names of the cities to create a chromosome
-        return chromosome
+        """Definition of the "chromosome" for the TSP problem: a compact array of city indices (see decode_chromosome)
+        With seeded_rate, some of them are nearest-neighbour tours from a random city"""
+        if self.seeded_rate and self.rng.random() < self.seeded_rate:
+            return self.nearest_neighbour_tour(int(self.rng.integers(len(self.possible_cities))))
+        return array(self._typecode, self.rng.permutation(len(self.possible_cities)).tolist()) #Shuffle the indices of the cities to create a chromosome
+
+    def encode_chromosome(self, road):
+        """Translate a list of city names to the compact chromosome used by the solver
+
+        Args:
+            road (list[str]): list of city names
+        """
+        return array(self._typecode, (self.city_index[c] for c in road))
     
     def problem_fitness(self, chromosome):
         """Definition of the fitness for the TSP problem
@@ -36,50 +219,304 @@ class TSProblem(GAProblem):
         Args:
             chromosome (array): The chromosome whose fitness is to be calculated
         """
-        return -cities.road_length(city_dict, chromosome) #Get the fitness and invert it bc we are looking for the shortest way/fitness
+        return -self.tour_length(chromosome) #Get the length with the distance matrix and invert it bc we are looking for the shortest way/fitness
 
     def reproduction(self, a, b):
         """
         Define the process of reproduction for the genetic algorithm problem
         Here the x_point(point that defines where parents are cut) is at the middle of parents chromosomes and it's not possible to have cities repetetion (we have to have all the cities one and no more than one time)
+        With another crossover option, the child is made by the crossovers of tsp_operators
 
         Args:
             a (array): A random chromosom from the population that will become one of the parent of the new chromosome
             b (array): A random chromosom from the population that will become the other parent of the new chromosome
         """
+        if self.crossover != 'midpoint':
+            pos_a, pos_b = self.rng.integers(0, len(a.chromosome), 2).tolist()
+            return array(self._typecode, self._crossover(a.chromosome, b.chromosome, pos_a, pos_b))
         x_point = len(a.chromosome)//2 #Get half the length of the chromosome (list of cities)
         new_chrom = a.chromosome[0:x_point] #Add the first half of parent "a" to the new chromosome
-        for city in range(x_point,len(b.chromosome)): #Iteration among the second half of parent "b"
-            if b.chromosome[city] not in new_chrom: #Chech if the city is not already in the newborn gene
-                new_chrom.append(b.chromosome[city]) #Add the city
+        taken = bytearray(len(self.possible_cities)) #taken[city] is 1 when the city is already in the newborn gene
+        for city in new_chrom:
+            taken[city] = 1
+        for city in b.chromosome[x_point:]: #Iteration among the second half of parent "b"
+            if not taken[city]: #Chech if the city is not already in the newborn gene
+                new_chrom.append(city) #Add the city
+                taken[city] = 1
         if len(new_chrom) < len(a.chromosome): #Check if the length of the new chromosome is right
-            for i in range(len(self.possible_cities)): #Iterate throught all cities
-                if self.possible_cities[i] not in new_chrom: #Check if a city is missing from the new chromosome
-                    new_chrom.append(self.possible_cities[i]) #Add the city
+            for city in range(len(self.possible_cities)): #Iterate throught all cities
+                if not taken[city]: #Check if a city is missing from the new chromosome
+                    new_chrom.append(city) #Add the city
         return new_chrom
 
+    def _crossover(self, a, b, pos_a, pos_b):
+        """Child of the tours a and b with the crossover option of the problem (not 'midpoint')
+        The section copied from a (OX, PMX) goes from pos_a to pos_b, the child of EAX starts from the city at pos_a in a"""
+        if self.crossover == 'eax':
+            return tsp_operators.edge_assembly_crossover(a, b, self.neighbour_lists, self.local_search.distance, a[pos_a])
+        start, end = min(pos_a, pos_b), max(pos_a, pos_b) + 1
+        if self.crossover == 'ox':
+            return tsp_operators.order_crossover(a, b, start, end)
+        return tsp_operators.partially_mapped_crossover(a, b, start, end)
+
     def mutation(self, new_chrom, len_chromosome):
         """Define the process of mutation for the genetic algorithm problem
-        Here we switch two random cities positions
+        Here we switch two random cities positions (or, with neighbour_mutation, we bring a city next to one of its neighbours)
         
         Args:
             new_chrom (array): the newborn chromosome
             len_chromosome (int): the length of a chromosome
         """
-        pos_a = random.randrange(0,len_chromosome) #Chose randomly a position in the length of the chromosome
-        pos_b = random.randrange(0,len_chromosome) #Chose randomly another position in the length of the chromosome
+        if self.neighbour_mutation:
+            return self._neighbour_move(new_chrom, len_chromosome)
+        pos_a, pos_b = self.rng.integers(0, len_chromosome, 2).tolist() #Chose randomly two positions in the length of the chromosome
         new_chrom[pos_a], new_chrom[pos_b] = new_chrom[pos_b], new_chrom[pos_a] #Invert the cities on those positions
         return new_chrom
 
+    def _neighbour_move(self, new_chrom, len_chromosome):
+        """Pick a random city and one of its nearest neighbours, and reverse the section of the tour between them
+        so that the neighbour comes right after (or before) the city - a 2-opt move restricted to short edges"""
+        pos = int(self.rng.integers(len_chromosome))
+        neighbour = self.neighbour_lists[new_chrom[pos]][int(self.rng.integers(self.neighbours.shape[1]))]
+        pos_neighbour = new_chrom.index(neighbour)
+        if pos_neighbour > pos:
+            new_chrom[pos+1:pos_neighbour+1] = new_chrom[pos+1:pos_neighbour+1][::-1]
+        else:
+            new_chrom[pos_neighbour:pos] = new_chrom[pos_neighbour:pos][::-1]
+        return new_chrom
+
+    def improvement(self, new_chrom):
+        """Improve the newborn tour with 2-opt / Or-opt moves (see tsp_operators.LocalSearch), with probability local_search_rate
+
+        Args:
+            new_chrom (array): the newborn chromosome
+        """
+        if self.local_search_rate and self.rng.random() < self.local_search_rate:
+            return array(self._typecode, self.local_search.improve(new_chrom))
+        return new_chrom
+
+    def operator_variants(self):
+        """Crossovers and mutations available to ga_adaptive.OperatorBandit"""
+        return {'crossover': CROSSOVERS, 'neighbour_mutation': (False, True)}
+
+    def canonical_chromosome(self, chromosome):
+        """Key of a tour for the fitness cache: all rotations and both directions of a loop have the same length, so they get the same key
+        (the tour starting from city 0, going first towards its neighbour of smallest index)
+
+        Args:
+            chromosome (array or ndarray): compact chromosome, or row of city indices
+        """
+        tour = np.asarray(chromosome)
+        tour = np.roll(tour, -int(np.argmin(tour))) #Start from city 0
+        if len(tour) > 2 and tour[-1] < tour[1]:
+            tour = np.concatenate((tour[:1], tour[:0:-1])) #Go the other way around
+        return tour.astype(np.int32).tobytes()
+
+    # Batch hooks for the vectorized mode of GASolver: a chromosome is a row of city indices in possible_cities
+
+    def batch_chromosomes(self, pop_size, rng):
+        """Create pop_size random tours at once
+
+        Args:
+            pop_size (int): number of chromosomes to create
+            rng (numpy.random.Generator): random generator to draw from
+        """
+        tours = np.tile(np.arange(len(self.possible_cities), dtype=self._dtype), (pop_size, 1))
+        tours = rng.permuted(tours, axis=1) #Shuffle each row independently
+        seeded = np.flatnonzero(rng.random(pop_size) < self.seeded_rate)
+        for row, start in zip(seeded, rng.integers(0, len(self.possible_cities), len(seeded))):
+            tours[row] = self.nearest_neighbour_tour(start)
+        return tours
+
+    def batch_fitness(self, chromosomes):
+        """Fitness of many tours at once (opposite of the road length, closing the loop)
+
+        Args:
+            chromosomes (ndarray): 2-D integer array, one tour per row
+        """
+        following = np.roll(chromosomes, -1, axis=1) #Next city of each city in each tour
+        if self._distances is not None:
+            return -self._distances[chromosomes, following].sum(axis=1)
+        legs = self._coords[chromosomes] - self._coords[following]
+        return -np.hypot(legs[..., 0], legs[..., 1]).sum(axis=1)
+
+    def batch_reproduction(self, a, b, rng):
+        """Same crossover as reproduction for every pair of parents at once:
+        the first half of "a", then the cities of the second half of "b" that are missing, then the remaining cities in index order
+        (the other crossover options are applied pair by pair)
+
+        Args:
+            a (ndarray): 2-D integer array, the first parent of each child
+            b (ndarray): 2-D integer array, the second parent of each child
+            rng (numpy.random.Generator): random generator to draw from (cut points of the other crossover options)
+        """
+        nb_children, nb_cities = a.shape
+        if self.crossover != 'midpoint': #The crossovers of tsp_operators work one pair of tours at a time
+            cuts = rng.integers(0, nb_cities, (nb_children, 2)).tolist()
+            return np.array([self._crossover(tour_a, tour_b, pos_a, pos_b) for tour_a, tour_b, (pos_a, pos_b) in zip(a.tolist(), b.tolist(), cuts)],
+                            dtype=a.dtype).reshape(a.shape)
+        x_point = nb_cities//2
+        #Rank each city by the position it will take after the first half: cities from b's second half first (in b's order),
+        #then the missing ones in index order, and the cities already taken from "a" last
+        rank = np.tile(np.arange(nb_cities, 2*nb_cities), (nb_children, 1))
+        np.put_along_axis(rank, b[:, x_point:], np.arange(nb_cities - x_point), axis=1)
+        np.put_along_axis(rank, a[:, :x_point], 3*nb_cities, axis=1)
+        tail = np.argsort(rank, axis=1, kind='stable')[:, :nb_cities - x_point]
+        return np.concatenate((a[:, :x_point], tail.astype(a.dtype)), axis=1)
+
+    def batch_mutation(self, chromosomes, rng):
+        """Swap two random cities in every given tour at once
+
+        Args:
+            chromosomes (ndarray): 2-D integer array of tours to mutate
+            rng (numpy.random.Generator): random generator to draw from
+        """
+        if self.neighbour_mutation:
+            return self._batch_neighbour_move(chromosomes, rng)
+        rows = np.arange(len(chromosomes))
+        pos_a, pos_b = rng.integers(0, chromosomes.shape[1], (2, len(chromosomes)))
+        chromosomes[rows, pos_a], chromosomes[rows, pos_b] = chromosomes[rows, pos_b], chromosomes[rows, pos_a]
+        return chromosomes
+
+    def _batch_neighbour_move(self, chromosomes, rng):
+        """Same move as _neighbour_move on every given tour at once"""
+        nb_tours, nb_cities = chromosomes.shape
+        rows = np.arange(nb_tours)
+        pos = rng.integers(0, nb_cities, nb_tours)
+        neighbour = self.neighbours[chromosomes[rows, pos], rng.integers(0, self.neighbours.shape[1], nb_tours)]
+        pos_neighbour = np.argmax(chromosomes == neighbour[:, None], axis=1)
+        low = np.where(pos_neighbour > pos, pos + 1, pos_neighbour) #Section to reverse: positions low to high
+        high = np.where(pos_neighbour > pos, pos_neighbour, pos - 1)
+        positions = np.arange(nb_cities)
+        reversed_section = (positions >= low[:, None]) & (positions <= high[:, None])
+        source = np.where(reversed_section, low[:, None] + high[:, None] - positions, positions)
+        return np.take_along_axis(chromosomes, source, axis=1)
+
+    def batch_improvement(self, chromosomes, rng):
+        """Improve a local_search_rate part of the children with the local search, tour by tour
+
+        Args:
+            chromosomes (ndarray): 2-D integer array of children
+            rng (numpy.random.Generator): random generator to draw from
+        """
+        if not self.local_search_rate:
+            return chromosomes
+        for row in np.flatnonzero(rng.random(len(chromosomes)) < self.local_search_rate):
+            chromosomes[row] = self.local_search.improve(chromosomes[row].tolist())
+        return chromosomes
+
+    def decode_chromosome(self, chromosome):
+        """Translate a compact chromosome or a row of city indices back to the list of city names"""
+        return [self.possible_cities[i] for i in chromosome]
+
+    def chromosome_from_row(self, row):
+        """Translate a row of city indices to a compact chromosome"""
+        return array(self._typecode, row.tolist())
+
+class TourFrameWriter(GenerationObserver):
+    """Headless rendering of a run: every "every" generations, the best tour is saved as an image file
+    (directory/frame_000100.png) by a background process, to watch long runs on servers without display.
+    Drawing a frame takes much longer than a generation of a small problem and would hold the GIL in a thread:
+    the process keeps the generations at full speed. While a frame is being drawn, the last requested one waits
+    and is drawn as soon as the process is free (the ones it replaced are skipped), and close() always draws the final tour."""
+
+    def __init__(self, solver, directory='frames', every=100, image_format='png', labels=None):
+        """
+        Args:
+            solver (GASolver): solver of a TSProblem, whose best tour is drawn
+            directory (str, optional): directory of the frames, created if needed. Defaults to 'frames'.
+            every (int, optional): draw one generation out of "every". Defaults to 100.
+            image_format (str, optional): 'png', 'svg' or any format of matplotlib. Defaults to 'png'.
+            labels (bool, optional): write the names of the cities. Defaults to None (only up to 50 cities).
+        """
+        self.solver = solver
+        self.directory = directory
+        self.every = every
+        self.image_format = image_format
+        self.labels = labels
+        self.nb_frames = 0
+        self.nb_skipped = 0
+        self._pool = None #Process drawing the frames, started with the first one
+        self._pending = None #Future of the frame being drawn
+        self._waiting = None #Arguments of the last frame requested while another one was being drawn
+        self._last_generation = None #Generation of the last frame requested
+        os.makedirs(directory, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def on_generation(self, statistics):
+        """Draw the best tour of the generation if it is one of the drawn ones, or the waiting frame if the process is free
+        (see GenerationObserver.on_generation)"""
+        if statistics['generation'] % self.every == 0:
+            self.write_frame()
+        elif self._waiting is not None and self._pending.done():
+            self._submit(self._waiting)
+        return False
+
+    def write_frame(self):
+        """Draw the best tour of the current generation in the background, or keep it waiting while another frame is being drawn
+
+        Returns:
+            str: the image file
+        """
+        generation = self.solver.get_generation()
+        best = self.solver.get_best_individual()
+        filename = os.path.join(self.directory, f"frame_{generation:06d}.{self.image_format}")
+        frame = (best.chromosome, filename, f"Generation {generation}: length {-best.fitness:.1f}", self.labels)
+        self._last_generation = generation
+        if self._waiting is not None: #Replaced by a more recent frame
+            self.nb_skipped += 1
+            self._waiting = None
+        if self._pending is not None and not self._pending.done():
+            self._waiting = frame
+        else:
+            self._submit(frame)
+        return filename
+
+    def _submit(self, frame):
+        """Send a frame to the drawing process"""
+        if self._pending is not None:
+            self._pending.result() #Raise the errors of the previous frame
+        if self._pool is None:
+            problem = self.solver.get_problem()
+            if problem.city_dict is not None:
+                city_dict = problem.city_dict
+            else: #Problem built from arrays: names and coordinates in the same order
+                city_dict = dict(zip(problem.possible_cities, map(tuple, problem._coords.tolist())))
+            self._pool = ProcessPoolExecutor(1, initializer=_init_frame_process, initargs=(city_dict,))
+        self._pending = self._pool.submit(_draw_frame, *frame)
+        self._waiting = None
+        self.nb_frames += 1
+
+    def close(self):
+        """Draw the waiting frame and the final tour (if it was not drawn yet), wait for them and stop the process"""
+        if self._last_generation != self.solver.get_generation():
+            self.write_frame()
+        if self._waiting is not None:
+            self._submit(self._waiting) #Waits for the frame being drawn
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._pending is not None:
+            self._pending.result()
+            self._pending = None
+
+
 if __name__ == '__main__':
 
     from ga_solver import GASolver
+    from ga_termination import Stagnation
 
     city_dict = cities.load_cities("cities.txt")
     problem = TSProblem(city_dict)
     solver = GASolver(problem)
     solver.reset_population()
-    solver.evolve_until(max_nb_of_generations=5000)
+    solver.evolve_until(max_nb_of_generations=5000, termination=Stagnation(500)) #Stop when the road has not improved for 500 generations
     best=solver.get_best_individual()
+    print(f"Stopped after {solver.get_generation()} generations ({solver.get_stop_reason()})")
     cities.draw_cities(city_dict, best.chromosome)
     print(best)
\ No newline at end of file